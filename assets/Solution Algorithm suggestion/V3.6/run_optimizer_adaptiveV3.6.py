@@ -4,11 +4,14 @@ import time
 import csv
 import glob
 import pickle
+import hashlib
+import atexit
 import numpy as np
 import random
 from datetime import datetime
 from tqdm import tqdm, trange
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
 
 """
 This algorithm gives a decent result on each run (each run: 5000 FEM calls or ~17h)
@@ -44,7 +47,26 @@ USER_INPUTS = {
     'resume': True,  # Attempt to read and use previous logs
     'max_ga_generations': 24,
     'ga_pop_size': 16,
+    # 'generational': evaluate a whole population, then breed the next one
+    # 'steady_state': breed and dispatch a new child from the elite archive whenever a worker is free
+    'ga_mode': 'generational',
+    'tournament_size': 3,
     'display_top_n': 3,
+    # Log of the FEM calls: npz chunks of log_chunk_rows calls (written and fsynced at the latest every
+    # log_flush_seconds) in <log_folder>/<run>_calls/, with log_csv also appended to <run>_calls.csv
+    'log_chunk_rows': 64,
+    'log_flush_seconds': 30.0,
+    'log_csv': True,
+    # How the FEM calls are run: 'serial', 'thread' (FEM is an external solver, one thread per license)
+    # or 'process' (FEM is Python code, one process per core, the FEM function must be picklable).
+    # Results and logs are the same for all of them.
+    'evaluator': 'serial',
+    'n_workers': 1,
+    # Keep every FEM result in <log_folder>/<run_id_prefix>_eval_cache.pkl, seeded from the previous logs.
+    # Designs that agree to cache_decimals decimals are looked up instead of computed again (and are counted
+    # once when the previous logs are resumed).
+    'eval_cache': True,
+    'cache_decimals': 6,
 }
 
 # --- END USER INPUTS ---
@@ -71,7 +93,7 @@ def unique_run_name(prefix, log_folder):
     base = f"{prefix}_{date}"
     # If already exists, increment number
     idx = 1
-    while os.path.exists(os.path.join(log_folder, f"{base}_calls.csv")):
+    while os.path.exists(os.path.join(log_folder, f"{base}_calls.csv")) or os.path.exists(os.path.join(log_folder, f"{base}_calls")):
         base = f"{prefix}_{date}_{idx}"
         idx += 1
     return base
@@ -97,29 +119,189 @@ def log_headers(n_strength, n_stability, n_buckling):
         *(f"rf_buckling_{i}" for i in range(n_buckling)),
     ]
 
-def read_previous_logs(log_folder, run_prefix):
-    # Find all logs matching prefix
-    files = glob.glob(os.path.join(log_folder, f"{run_prefix}_*_calls.csv"))
-    if not files:
-        return []
-    all_rows = []
-    for file in files:
+RF_GROUPS = ("rf_strength", "rf_stability", "rf_buckling")
+
+def fsync_dir(path):
+    # Make renames in path durable, directories cannot be opened on Windows
+    if os.name != 'nt':
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class LogSink:
+    """
+    Buffered log of the FEM calls of one run. Calls are collected in memory and written as one npz chunk
+    <run_base>_calls/chunk_NNNNN.npz every chunk_rows calls or flush_seconds, fsynced, so a crash loses at most the
+    buffer. Chunk columns: timestamp, stage, region, fem_call_idx, x (calls x variables), weight and rf_strength,
+    rf_stability, rf_buckling (calls x RFs, NaN where a call returned less RFs).
+    With csv_export the chunks are also appended to <run_base>_calls.csv in the format of log_headers.
+    """
+    def __init__(self, log_folder, run_base, n_strength, n_stability, n_buckling, chunk_rows=64, flush_seconds=30.0, csv_export=True):
+        self.chunk_dir = os.path.join(log_folder, f"{run_base}_calls")
+        self.csv_path = os.path.join(log_folder, f"{run_base}_calls.csv") if csv_export else None
+        self.headers = log_headers(n_strength, n_stability, n_buckling)
+        self.n_rf = (n_strength, n_stability, n_buckling)
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self.rows = []
+        self.n_chunks = 0
+        self.last_flush = time.time()
+
+    def write(self, x, y, stage, region, fem_call_idx):
+        self.rows.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), str(stage), str(region), fem_call_idx, x, y))
+        if len(self.rows) >= self.chunk_rows or time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.time()
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        columns = {
+            "timestamp": np.array([r[0] for r in rows]),
+            "stage": np.array([r[1] for r in rows]),
+            "region": np.array([r[2] for r in rows]),
+            "fem_call_idx": np.array([r[3] for r in rows], dtype=np.int64),
+            "x": np.array([np.asarray(r[4], dtype=np.float64) for r in rows]),
+            "weight": np.array([r[5][0] for r in rows], dtype=np.float64),
+        }
+        for group, (name, n_rf) in enumerate(zip(RF_GROUPS, self.n_rf)):
+            rf = np.full((len(rows), n_rf), np.nan)
+            for i, r in enumerate(rows):
+                values = np.asarray(r[5][group + 1], dtype=np.float64)[:n_rf]
+                rf[i, :len(values)] = values
+            columns[name] = rf
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        path = os.path.join(self.chunk_dir, f"chunk_{self.n_chunks:05d}.npz")
+        with open(path + ".tmp", 'wb') as f:
+            np.savez(f, **columns)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        fsync_dir(self.chunk_dir)
+        self.n_chunks += 1
+        if self.csv_path:
+            self.export_csv(columns)
+
+    def export_csv(self, columns):
+        file_exists = os.path.isfile(self.csv_path)
+        rf = np.hstack([columns[name] for name in RF_GROUPS])
+        missing = np.isnan(rf)
+        rf = rf.astype(object)
+        rf[missing] = ""
+        with open(self.csv_path, 'a', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(self.headers)
+            for i in range(len(columns["weight"])):
+                writer.writerow([columns["timestamp"][i], columns["stage"][i], columns["region"][i], columns["fem_call_idx"][i],
+                                 *columns["x"][i].tolist(), columns["weight"][i].item(), *rf[i]])
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+
+    def close(self):
+        self.flush()
+
+HISTORY_COLUMNS = ("x", "weight", "rf_strength", "rf_stability", "rf_buckling", "fem_call_idx")
+
+def history_sources(log_folder, run_prefix):
+    # npz chunks of the logs, plus the CSV logs of runs without chunks (runs from before the npz logs)
+    sources = sorted(glob.glob(os.path.join(log_folder, f"{run_prefix}_*_calls", "chunk_*.npz")))
+    for file in sorted(glob.glob(os.path.join(log_folder, f"{run_prefix}_*_calls.csv"))):
+        if not os.path.isdir(file[:-len(".csv")]):
+            sources.append(file)
+    return sources
+
+def read_log_chunk(file):
+    with np.load(file) as chunk:
+        return {name: chunk[name] for name in HISTORY_COLUMNS}
+
+def read_log_csv(file):
+    # <run>_calls.csv as arrays like the npz chunks, empty RF cells become NaN
+    with open(file, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        # Rows cut off by a crash have less cells
+        rows = [row for row in reader if header and len(row) == len(header)]
+    if not rows:
+        return None
+    rf_names = {group: sorted((name for name in header if name.startswith(group + "_")), key=lambda name: int(name[len(group) + 1:]))
+                for group in RF_GROUPS}
+    names = [*USER_INPUTS['variable_names'], "weight", "fem_call_idx", *(name for group in RF_GROUPS for name in rf_names[group])]
+    positions = [header.index(name) for name in names]
+    table = np.array([[float(row[i]) if row[i] else np.nan for i in positions] for row in rows], dtype=np.float64)
+    n_x = len(USER_INPUTS['variable_names'])
+    part = {
+        "x": table[:, :n_x],
+        "weight": table[:, n_x],
+        "fem_call_idx": table[:, n_x + 1].astype(np.int64),
+    }
+    start = n_x + 2
+    for group in RF_GROUPS:
+        part[group] = table[:, start:start + len(rf_names[group])]
+        start += len(rf_names[group])
+    return part
+
+def merge_history(parts, decimals):
+    # Concatenate, RF matrices padded with NaN to the widest one, and keep the first call of every rounded design
+    width = {group: max(part[group].shape[1] for part in parts) for group in RF_GROUPS}
+    history = {name: np.concatenate([part[name] for part in parts]) for name in ("x", "weight", "fem_call_idx")}
+    for group in RF_GROUPS:
+        history[group] = np.concatenate([np.pad(part[group], ((0, 0), (0, width[group] - part[group].shape[1])), constant_values=np.nan)
+                                         for part in parts])
+    _, first = np.unique(np.round(history["x"], decimals) + 0.0, axis=0, return_index=True)
+    keep = np.sort(first)
+    return {name: values[keep] for name, values in history.items()}
+
+def load_history(log_folder, run_prefix, decimals=6):
+    """
+    All FEM calls of the previous runs as arrays: x (calls x variables), weight, rf_strength, rf_stability,
+    rf_buckling (calls x RFs, NaN padded) and fem_call_idx. Designs that were logged more than once (in several runs
+    or as cache hits) are kept once. The arrays are stored in <log_folder>/<run_prefix>_history.npz with the size
+    and mtime of the files they come from, so later runs only read the files that are new since.
+
+    Returns:
+        Dictionary of arrays, None if there are no previous calls
+    """
+    index_path = os.path.join(log_folder, f"{run_prefix}_history.npz")
+    sources = history_sources(log_folder, run_prefix)
+    stats = {file: (os.stat(file).st_size, os.stat(file).st_mtime_ns) for file in sources}
+    history, indexed = None, {}
+    if os.path.isfile(index_path):
         try:
-            with open(file, 'r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    all_rows.append(row)
+            with np.load(index_path) as stored:
+                if int(stored["decimals"]) == decimals:
+                    indexed = {str(file): (int(size), int(mtime)) for file, size, mtime in zip(stored["sources"], stored["sizes"], stored["mtimes"])}
+                    history = {name: stored[name] for name in HISTORY_COLUMNS}
+        except Exception as e:
+            print(f"Warning: Failed to read {index_path} ({e})")
+    # Indexed files that changed or were deleted since: index everything again
+    if any(stats.get(file) != stat for file, stat in indexed.items()):
+        history, indexed = None, {}
+    new = [file for file in sources if file not in indexed]
+    if not new:
+        return history
+    parts = [history] if history is not None else []
+    for file in new:
+        try:
+            part = read_log_chunk(file) if file.endswith(".npz") else read_log_csv(file)
         except Exception as e:
             print(f"Warning: Failed to read {file} ({e})")
-    return all_rows
-
-def save_csv_row(file_path, headers, row):
-    file_exists = os.path.isfile(file_path)
-    with open(file_path, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=headers)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+            continue
+        if part is not None:
+            parts.append(part)
+        indexed[file] = stats[file]
+    history = merge_history(parts, decimals) if parts else None
+    if history is not None:
+        tmp = index_path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, decimals=decimals, sources=np.array(list(indexed), dtype=str),
+                     sizes=np.array([stat[0] for stat in indexed.values()], dtype=np.int64),
+                     mtimes=np.array([stat[1] for stat in indexed.values()], dtype=np.int64), **history)
+        os.replace(tmp, index_path)
+    return history
 
 def save_summary(log_folder, run_base, summary, header, append=False):
     file_path = os.path.join(log_folder, f"{run_base}_report.csv")
@@ -134,10 +316,13 @@ def get_rf_lengths(y):
     # y = (weight, rf_strength, rf_stability, rf_buckling)
     return len(y[1]), len(y[2]), len(y[3])
 
-def print_summary(best, near_misses, stage, region, calls_used, calls_total):
+def print_summary(best, near_misses, stage, region, calls_used, calls_total, cache=None):
     clear_console()
     print(f"=== Optimization Progress (Stage: {stage} | Region: {region}) ===")
-    print(f"Total FEM calls used: {calls_used} / {calls_total}\n")
+    print(f"Total FEM calls used: {calls_used} / {calls_total}")
+    if cache is not None:
+        print(f"Eval cache: {cache.hits} hits / {cache.misses} misses ({len(cache.results)} designs stored)")
+    print()
     print(f"Current Best (All RFs ≥ {USER_INPUTS['target_rf']}):")
     if best:
         print(f"  Mass: {best['weight']:.3f} | Inputs: {np.round(best['x'],3)}")
@@ -186,32 +371,167 @@ def fem_eval(x):
         print(f"FEM call failed for x={x}: {e}")
         return None
 
-def evaluate_points(xs, stage, region, start_fem_idx, log_path, headers, n_strength, n_stability, n_buckling, progress_bar=None):
+def timed_fem_eval(x):
+    # Runs in the worker, so the runtime is the one of the FEM call and not of the queue
+    t0 = time.time()
+    y = fem_eval(x)
+    return y, time.time() - t0
+
+class EvalCache:
+    """
+    FEM results by design vector. Vectors are rounded to `decimals` before hashing, so repeated designs (children
+    clipped to the bounds, elites, Nelder-Mead revisits) are computed once. Stored as a pickle and shared across runs.
+    """
+    def __init__(self, path=None, decimals=6):
+        self.path = path
+        self.decimals = decimals
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.isfile(path):
+            try:
+                with open(path, 'rb') as f:
+                    stored = pickle.load(f)
+                # Keys of other roundings do not match, start over then
+                if stored.get('decimals') == decimals:
+                    self.results = stored['results']
+            except Exception as e:
+                print(f"Warning: Failed to read {path} ({e})")
+
+    def key(self, x):
+        # + 0.0 turns -0.0 into 0.0, both must give the same key
+        q = np.round(np.asarray(x, dtype=np.float64), self.decimals) + 0.0
+        return hashlib.sha1(q.tobytes()).hexdigest()
+
+    def get(self, x):
+        y = self.results.get(self.key(x))
+        if y is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return y
+
+    def put(self, x, y):
+        # Failed calls are not stored, they are tried again
+        if y is not None:
+            weight, rf_strength, rf_stability, rf_buckling = y
+            self.results[self.key(x)] = (float(weight), np.asarray(rf_strength, dtype=np.float64),
+                                         np.asarray(rf_stability, dtype=np.float64), np.asarray(rf_buckling, dtype=np.float64))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({'decimals': self.decimals, 'results': self.results}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+def make_eval_cache():
+    if not USER_INPUTS['eval_cache']:
+        return None
+    path = os.path.join(USER_INPUTS['log_folder'], f"{USER_INPUTS['run_id_prefix']}_eval_cache.pkl")
+    return EvalCache(path, USER_INPUTS['cache_decimals'])
+
+EVALUATOR_BACKENDS = ('serial', 'thread', 'process')
+
+class Evaluator:
+    """
+    Runs fem_eval for batches of design vectors, serially or on a pool of n_workers threads/processes.
+    map always returns the results in the order of xs, so call indices and log rows do not depend on the backend.
+    With an EvalCache every design is looked up first, hits come back with runtime 0 and still count as calls, so
+    the budget accounting and the logs are the same with and without the cache.
+    """
+    def __init__(self, backend='serial', n_workers=1, cache=None):
+        if backend not in EVALUATOR_BACKENDS:
+            raise ValueError(f"Unknown evaluator '{backend}', use one of {EVALUATOR_BACKENDS}")
+        self.backend = backend
+        self.n_workers = max(1, int(n_workers))
+        self.cache = cache
+        self.pool = None
+        if backend == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers=self.n_workers)
+        elif backend == 'process':
+            self.pool = ProcessPoolExecutor(max_workers=self.n_workers)
+
+    def evaluate(self, x):
+        # Single call in this process, e.g. for the sequential refinement
+        y = self.cache.get(x) if self.cache is not None else None
+        if y is not None:
+            return y, 0.0
+        y, runtime = timed_fem_eval(x)
+        if self.cache is not None:
+            self.cache.put(x, y)
+        return y, runtime
+
+    def submit(self, x):
+        # Future of (y, runtime), the serial evaluator and cache hits are done right away. Take the result with
+        # collect, which stores it in the cache in this thread
+        if self.pool is None:
+            future = Future()
+            future.set_result(self.evaluate(x))
+            return future
+        y = self.cache.get(x) if self.cache is not None else None
+        if y is not None:
+            future = Future()
+            future.set_result((y, 0.0))
+            return future
+        return self.pool.submit(timed_fem_eval, x)
+
+    def collect(self, future, x):
+        # (y, runtime) of a finished submit(x)
+        y, runtime = future.result()
+        if self.cache is not None:
+            self.cache.put(x, y)
+        return y, runtime
+
+    def map(self, xs):
+        # Yields (y, runtime) per x, y is None for failed FEM calls
+        if self.pool is None:
+            for x in xs:
+                yield self.evaluate(x)
+            return
+        if self.cache is None:
+            yield from self.pool.map(timed_fem_eval, xs)
+            return
+        # Submit every design that is not cached once, duplicates within xs wait for the first one
+        misses = {}
+        for x in xs:
+            key = self.cache.key(x)
+            if key not in self.cache.results:
+                misses.setdefault(key, x)
+        computed = zip(misses, self.pool.map(timed_fem_eval, misses.values()))
+        failed = set()
+        for x in xs:
+            if self.cache.key(x) in failed:
+                yield None, 0.0
+                continue
+            y = self.cache.get(x)
+            if y is not None:
+                yield y, 0.0
+                continue
+            key, (y, runtime) = next(computed)
+            self.cache.put(x, y)
+            if y is None:
+                failed.add(key)
+            yield y, runtime
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+def make_evaluator(cache=None):
+    return Evaluator(USER_INPUTS['evaluator'], USER_INPUTS['n_workers'], cache)
+
+def evaluate_points(xs, stage, region, start_fem_idx, log, progress_bar=None, evaluator=None):
+    if evaluator is None:
+        evaluator = Evaluator()
     results = []
-    for i, x in enumerate(xs):
-        t0 = time.time()
-        y = fem_eval(x)
-        t1 = time.time()
+    for i, (x, (y, runtime)) in enumerate(zip(xs, evaluator.map(xs))):
         if y is None:
             continue
         weight, rf_strength, rf_stability, rf_buckling = y
-        row = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "stage": stage,
-            "region": region,
-            "fem_call_idx": start_fem_idx + i,
-        }
-        for idx, name in enumerate(USER_INPUTS['variable_names']):
-            row[name] = x[idx]
-        row["weight"] = weight
-        # Flatten RFs for logging
-        for idx in range(n_strength):
-            row[f"rf_strength_{idx}"] = rf_strength[idx] if idx < len(rf_strength) else ""
-        for idx in range(n_stability):
-            row[f"rf_stability_{idx}"] = rf_stability[idx] if idx < len(rf_stability) else ""
-        for idx in range(n_buckling):
-            row[f"rf_buckling_{idx}"] = rf_buckling[idx] if idx < len(rf_buckling) else ""
-        save_csv_row(log_path, headers, row)
+        log.write(x, y, stage, region, start_fem_idx + i)
         results.append({
             "x": np.array(x),
             "weight": weight,
@@ -219,7 +539,7 @@ def evaluate_points(xs, stage, region, start_fem_idx, log_path, headers, n_stren
             "rf_stability": np.array(rf_stability),
             "rf_buckling": np.array(rf_buckling),
             "call_idx": start_fem_idx + i,
-            "runtime": t1-t0,
+            "runtime": runtime,
         })
         if progress_bar:
             progress_bar.update(1)
@@ -252,50 +572,125 @@ def cluster_points(points, n_clusters):
     centers = kmeans.cluster_centers_
     return regions, centers
 
-def genetic_algorithm(region_points, n_strength, n_stability, n_buckling, log_path, headers, fem_call_start, max_calls, stage, region_idx):
-    # Simple (μ+λ) GA, population = region_points + randoms
-    pop_size = USER_INPUTS['ga_pop_size']
-    generations = USER_INPUTS['max_ga_generations']
-    bounds = USER_INPUTS['bounds']
+def ga_seeds(region_points, pop_size, bounds):
     # Select top N solutions so far as seeds
     sorted_pts = sorted(region_points, key=lambda p: (np.min(np.concatenate([p['rf_strength'], p['rf_stability'], p['rf_buckling']])) < USER_INPUTS['target_rf'], p['weight']))
     seeds = [p['x'] for p in sorted_pts[:max(2, pop_size//2)]]
     # Fill with randoms
     while len(seeds) < pop_size:
         seeds.append(np.array([random.uniform(l, h) for l, h in bounds]))
-    population = [np.copy(x) for x in seeds]
+    return [np.copy(x) for x in seeds]
+
+def breed(p1, p2, bounds):
+    cross = np.where(np.random.rand(len(p1)) < 0.5, p1, p2)
+    # Small mutation: add Gaussian noise to each variable
+    mutation = np.random.normal(0, 0.04 * (np.array([h-l for l,h in bounds])), len(p1))
+    child = cross + mutation
+    # Clip to bounds
+    return np.clip(child, [l for l,_ in bounds], [h for _,h in bounds])
+
+def tournament(archive, size):
+    # archive is sorted best first, so the best of the drawn positions is the smallest one
+    return archive[min(random.sample(range(len(archive)), min(size, len(archive))))][2]
+
+def genetic_algorithm(region_points, log, fem_call_start, max_calls, stage, region_idx, evaluator=None):
+    # Simple (μ+λ) GA, population = region_points + randoms
+    pop_size = USER_INPUTS['ga_pop_size']
+    generations = USER_INPUTS['max_ga_generations']
+    bounds = USER_INPUTS['bounds']
+    population = ga_seeds(region_points, pop_size, bounds)
+    if evaluator is None:
+        evaluator = Evaluator()
     results = []
     fem_call_idx = fem_call_start
     for gen in range(generations):
         new_pop = []
         # Selection: Tournament on best (by valid weight, then weight)
         pop_metrics = []
-        for x in population:
-            y = fem_eval(x)
+        # Evaluate the population in batches of at most the remaining budget, failed calls do not count against it
+        start = 0
+        while start < len(population) and fem_call_idx < fem_call_start + max_calls:
+            batch = population[start:start + fem_call_start + max_calls - fem_call_idx]
+            start += len(batch)
+            for x, (y, runtime) in zip(batch, evaluator.map(batch)):
+                if y is None:
+                    continue
+                weight, rf_strength, rf_stability, rf_buckling = y
+                rf_min = min(np.min(rf_strength), np.min(rf_stability), np.min(rf_buckling))
+                valid = rf_min >= USER_INPUTS['target_rf']
+                pop_metrics.append((valid, weight, x, y))
+                # Log
+                log.write(x, y, stage, region_idx, fem_call_idx)
+                results.append({
+                    "x": np.copy(x),
+                    "weight": weight,
+                    "rf_strength": np.array(rf_strength),
+                    "rf_stability": np.array(rf_stability),
+                    "rf_buckling": np.array(rf_buckling),
+                    "call_idx": fem_call_idx,
+                    "runtime": runtime,
+                })
+                fem_call_idx += 1
+        if fem_call_idx >= fem_call_start + max_calls:
+            return results
+        # Elitism: top 2 retained
+        pop_metrics = sorted(pop_metrics, key=lambda t: (not t[0], t[1]))
+        elites = [np.copy(t[2]) for t in pop_metrics[:2]]
+        # Crossover and Mutation to fill population
+        while len(new_pop) < pop_size:
+            p1 = random.choice(population)
+            p2 = random.choice(population)
+            new_pop.append(breed(p1, p2, bounds))
+        population = elites + new_pop[:pop_size-2]
+        if fem_call_idx >= fem_call_start + max_calls:
+            break
+    return results
+
+def steady_state_ga(region_points, log, fem_call_start, max_calls, stage, region_idx, evaluator=None):
+    """
+    Asynchronous (μ+1) GA: no generation barrier, whenever a FEM call finishes its design goes into the elite
+    archive (the best pop_size designs so far, valid first, then by weight) and a new child bred from two
+    tournament winners of the archive is dispatched right away. Log rows and call indices follow the order in which
+    the calls finish. Same budget as genetic_algorithm: max_calls successful calls, at most generations * pop_size
+    calls in total.
+    """
+    pop_size = USER_INPUTS['ga_pop_size']
+    max_submits = USER_INPUTS['max_ga_generations'] * pop_size
+    bounds = USER_INPUTS['bounds']
+    if evaluator is None:
+        evaluator = Evaluator()
+    seeds = ga_seeds(region_points, pop_size, bounds)
+    archive = []  # (valid, weight, x), best first
+    pending = {}
+    results = []
+    fem_call_idx = fem_call_start
+    n_submits = 0
+    while True:
+        # Fill the free workers, never more calls in flight than budget left
+        while len(pending) < evaluator.n_workers and n_submits < max_submits \
+                and fem_call_idx + len(pending) < fem_call_start + max_calls:
+            if seeds:
+                x = seeds.pop(0)
+            elif len(archive) >= 2:
+                x = breed(tournament(archive, USER_INPUTS['tournament_size']), tournament(archive, USER_INPUTS['tournament_size']), bounds)
+            else:
+                # Not enough successful calls to select from yet
+                pool = [t[2] for t in archive] + list(pending.values())
+                x = breed(random.choice(pool), random.choice(pool), bounds) if pool else np.array([random.uniform(l, h) for l, h in bounds])
+            pending[evaluator.submit(x)] = x
+            n_submits += 1
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            x = pending.pop(future)
+            y, runtime = evaluator.collect(future, x)
             if y is None:
                 continue
             weight, rf_strength, rf_stability, rf_buckling = y
             rf_min = min(np.min(rf_strength), np.min(rf_stability), np.min(rf_buckling))
             valid = rf_min >= USER_INPUTS['target_rf']
-            pop_metrics.append((valid, weight, x, y))
-            # Log
-            row = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "stage": stage,
-                "region": region_idx,
-                "fem_call_idx": fem_call_idx,
-            }
-            for idx, name in enumerate(USER_INPUTS['variable_names']):
-                row[name] = x[idx]
-            row["weight"] = weight
-            for idx in range(n_strength):
-                row[f"rf_strength_{idx}"] = rf_strength[idx] if idx < len(rf_strength) else ""
-            for idx in range(n_stability):
-                row[f"rf_stability_{idx}"] = rf_stability[idx] if idx < len(rf_stability) else ""
-            for idx in range(n_buckling):
-                row[f"rf_buckling_{idx}"] = rf_buckling[idx] if idx < len(rf_buckling) else ""
-            save_csv_row(log_path, headers, row)
-            fem_call_idx += 1
+            log.write(x, y, stage, region_idx, fem_call_idx)
             results.append({
                 "x": np.copy(x),
                 "weight": weight,
@@ -303,27 +698,12 @@ def genetic_algorithm(region_points, n_strength, n_stability, n_buckling, log_pa
                 "rf_stability": np.array(rf_stability),
                 "rf_buckling": np.array(rf_buckling),
                 "call_idx": fem_call_idx,
-                "runtime": None,
+                "runtime": runtime,
             })
-            if fem_call_idx >= fem_call_start + max_calls:
-                return results
-        # Elitism: top 2 retained
-        pop_metrics = sorted(pop_metrics, key=lambda t: (not t[0], t[1]))
-        elites = [np.copy(t[2]) for t in pop_metrics[:2]]
-        # Crossover and Mutation to fill population
-        while len(new_pop) < pop_size:
-            p1 = random.choice(population)
-            p2 = random.choice(population)
-            cross = np.where(np.random.rand(len(p1)) < 0.5, p1, p2)
-            # Small mutation: add Gaussian noise to each variable
-            mutation = np.random.normal(0, 0.04 * (np.array([h-l for l,h in bounds])), len(p1))
-            child = cross + mutation
-            # Clip to bounds
-            child = np.clip(child, [l for l,_ in bounds], [h for _,h in bounds])
-            new_pop.append(child)
-        population = elites + new_pop[:pop_size-2]
-        if fem_call_idx >= fem_call_start + max_calls:
-            break
+            fem_call_idx += 1
+            # Elitism: the archive keeps the best pop_size designs
+            archive.append((valid, weight, np.copy(x)))
+            archive = sorted(archive, key=lambda t: (not t[0], t[1]))[:pop_size]
     return results
 
 def find_best_and_near_misses(results, target_rf, top_n=3):
@@ -351,58 +731,60 @@ def main():
     make_log_folder(USER_INPUTS['log_folder'])
     # Unique run name
     run_base = unique_run_name(USER_INPUTS['run_id_prefix'], USER_INPUTS['log_folder'])
-    log_path = os.path.join(USER_INPUTS['log_folder'], f"{run_base}_calls.csv")
+    cache = make_eval_cache()
 
     # Load any previous logs
     all_results = []
     n_strength = n_stability = n_buckling = None
     if USER_INPUTS['resume']:
-        prev_rows = read_previous_logs(USER_INPUTS['log_folder'], USER_INPUTS['run_id_prefix'])
-        if prev_rows:
-            print(f"Found {len(prev_rows)} rows from previous runs. Incorporating for initial analysis.")
-            for row in prev_rows:
-                try:
-                    x = np.array([float(row[v]) for v in USER_INPUTS['variable_names']])
-                    weight = float(row['weight'])
-                    rf_strength = [float(row[f"rf_strength_{i}"]) for i in range(1000) if f"rf_strength_{i}" in row and row[f"rf_strength_{i}"] != ""]
-                    rf_stability = [float(row[f"rf_stability_{i}"]) for i in range(1000) if f"rf_stability_{i}" in row and row[f"rf_stability_{i}"] != ""]
-                    rf_buckling = [float(row[f"rf_buckling_{i}"]) for i in range(1000) if f"rf_buckling_{i}" in row and row[f"rf_buckling_{i}"] != ""]
-                    all_results.append({
-                        "x": x, "weight": weight,
-                        "rf_strength": np.array(rf_strength),
-                        "rf_stability": np.array(rf_stability),
-                        "rf_buckling": np.array(rf_buckling),
-                        "call_idx": int(row.get("fem_call_idx", -1))
-                    })
-                    if n_strength is None: n_strength = len(rf_strength)
-                    if n_stability is None: n_stability = len(rf_stability)
-                    if n_buckling is None: n_buckling = len(rf_buckling)
-                except Exception as e:
-                    print(f"Error parsing previous row: {e}")
+        history = load_history(USER_INPUTS['log_folder'], USER_INPUTS['run_id_prefix'], USER_INPUTS['cache_decimals'])
+        if history is not None:
+            print(f"Found {len(history['weight'])} designs from previous runs. Incorporating for initial analysis.")
+            n_strength, n_stability, n_buckling = (history[group].shape[1] for group in RF_GROUPS)
+            rfs = [[rf[~np.isnan(rf)] for rf in history[group]] for group in RF_GROUPS]
+            for i, (x, weight, call_idx) in enumerate(zip(history['x'], history['weight'].tolist(), history['fem_call_idx'].tolist())):
+                rf_strength, rf_stability, rf_buckling = rfs[0][i], rfs[1][i], rfs[2][i]
+                all_results.append({
+                    "x": x, "weight": weight,
+                    "rf_strength": rf_strength,
+                    "rf_stability": rf_stability,
+                    "rf_buckling": rf_buckling,
+                    "call_idx": call_idx
+                })
+                if cache is not None:
+                    cache.put(x, (weight, rf_strength, rf_stability, rf_buckling))
     fem_calls_used = len(all_results)
+    # Worker pool for the sampling and GA stages, the refinement below is sequential
+    evaluator = make_evaluator(cache)
     # If no prior data, need to run 1 to get RF lengths
     if n_strength is None or n_stability is None or n_buckling is None:
         print("Performing an initial FEM call to determine RF output lengths...")
         test_x = [random.uniform(l, h) for l, h in USER_INPUTS['bounds']]
-        y = fem_eval(test_x)
+        y, _ = evaluator.evaluate(test_x)
         if y is None:
             print("ERROR: Initial FEM call failed, cannot proceed.")
+            evaluator.close()
             return
         n_strength, n_stability, n_buckling = get_rf_lengths(y)
 
-    headers = log_headers(n_strength, n_stability, n_buckling)
+    log = LogSink(USER_INPUTS['log_folder'], run_base, n_strength, n_stability, n_buckling,
+                  USER_INPUTS['log_chunk_rows'], USER_INPUTS['log_flush_seconds'], USER_INPUTS['log_csv'])
+    # Write the buffer also when the run is interrupted
+    atexit.register(log.close)
 
     # --- STAGE 1: Initial Random Sampling (using reduced 5D) ---
     print("Stage 1: Initial broad random sampling (reduced 5D -> 25D)...")
     n_sample = int(USER_INPUTS['fem_call_budget'] * USER_INPUTS['sampling_fraction'])
     random_points = sample_random_points(n_sample, USER_INPUTS['bounds'], reduce_to_5d=True)
     pbar1 = tqdm(total=n_sample, desc="Random Sampling", ncols=70)
-    results1 = evaluate_points(random_points, "sampling", -1, fem_calls_used, log_path, headers, n_strength, n_stability, n_buckling, pbar1)
+    results1 = evaluate_points(random_points, "sampling", -1, fem_calls_used, log, pbar1, evaluator)
     pbar1.close()
     all_results.extend(results1)
     fem_calls_used += len(results1)
+    if cache is not None:
+        cache.save()
     best, near_misses = find_best_and_near_misses(all_results, USER_INPUTS['target_rf'], USER_INPUTS['display_top_n'])
-    print_summary(best, near_misses, "sampling", "-", fem_calls_used, USER_INPUTS['fem_call_budget'])
+    print_summary(best, near_misses, "sampling", "-", fem_calls_used, USER_INPUTS['fem_call_budget'], cache)
     save_summary(USER_INPUTS['log_folder'], run_base, {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "stage": "sampling",
@@ -431,13 +813,15 @@ def main():
         n_extra = max(0, region_budgets[region_idx] - len(reg_points))
         nearby_points = [np.clip(x_seed + np.random.normal(0, 0.08, 25), [l for l,_ in USER_INPUTS['bounds']], [h for _,h in USER_INPUTS['bounds']]).tolist() for _ in range(n_extra)]
         pbar2 = tqdm(total=n_extra, desc=f"Region {region_idx+1} Sampling", ncols=70)
-        results2 = evaluate_points(nearby_points, "region_sampling", region_idx, fem_calls_used, log_path, headers, n_strength, n_stability, n_buckling, pbar2)
+        results2 = evaluate_points(nearby_points, "region_sampling", region_idx, fem_calls_used, log, pbar2, evaluator)
         pbar2.close()
         all_results.extend(results2)
         fem_calls_used += len(results2)
+        if cache is not None:
+            cache.save()
         if fem_calls_used % USER_INPUTS['report_every'] < len(results2):
             best, near_misses = find_best_and_near_misses(all_results, USER_INPUTS['target_rf'], USER_INPUTS['display_top_n'])
-            print_summary(best, near_misses, "region_sampling", region_idx, fem_calls_used, USER_INPUTS['fem_call_budget'])
+            print_summary(best, near_misses, "region_sampling", region_idx, fem_calls_used, USER_INPUTS['fem_call_budget'], cache)
             save_summary(USER_INPUTS['log_folder'], run_base, {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "stage": f"region_{region_idx}",
@@ -457,12 +841,15 @@ def main():
     for idx in region_order:
         reg = regions[idx]
         print(f"\nRunning GA in Region {idx+1}/{n_clusters} ...")
-        results_ga = genetic_algorithm(reg, n_strength, n_stability, n_buckling, log_path, headers, fem_calls_used, ga_budget_per_region, "ga", idx)
+        ga = steady_state_ga if USER_INPUTS['ga_mode'] == 'steady_state' else genetic_algorithm
+        results_ga = ga(reg, log, fem_calls_used, ga_budget_per_region, "ga", idx, evaluator)
         all_results.extend(results_ga)
         fem_calls_used += len(results_ga)
+        if cache is not None:
+            cache.save()
         if fem_calls_used % USER_INPUTS['report_every'] < len(results_ga):
             best, near_misses = find_best_and_near_misses(all_results, USER_INPUTS['target_rf'], USER_INPUTS['display_top_n'])
-            print_summary(best, near_misses, "GA", idx, fem_calls_used, USER_INPUTS['fem_call_budget'])
+            print_summary(best, near_misses, "GA", idx, fem_calls_used, USER_INPUTS['fem_call_budget'], cache)
             save_summary(USER_INPUTS['log_folder'], run_base, {
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "stage": f"GA_{idx}",
@@ -479,7 +866,7 @@ def main():
     if best is not None:
         from scipy.optimize import minimize
         def penalty_obj(x):
-            y = fem_eval(x)
+            y, _ = evaluator.evaluate(x)
             if y is None:
                 return 1e8
             weight, rf_strength, rf_stability, rf_buckling = y
@@ -495,25 +882,10 @@ def main():
         options = {'maxiter': refine_calls, 'disp': False}
         res = minimize(penalty_obj, x0, method='Nelder-Mead', bounds=bounds, options=options)
         # Final eval of result
-        y = fem_eval(res.x)
+        y, _ = evaluator.evaluate(res.x)
         if y is not None:
             weight, rf_strength, rf_stability, rf_buckling = y
-            row = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "stage": "refine",
-                "region": "best",
-                "fem_call_idx": fem_calls_used,
-            }
-            for idx, name in enumerate(USER_INPUTS['variable_names']):
-                row[name] = res.x[idx]
-            row["weight"] = weight
-            for idx in range(n_strength):
-                row[f"rf_strength_{idx}"] = rf_strength[idx] if idx < len(rf_strength) else ""
-            for idx in range(n_stability):
-                row[f"rf_stability_{idx}"] = rf_stability[idx] if idx < len(rf_stability) else ""
-            for idx in range(n_buckling):
-                row[f"rf_buckling_{idx}"] = rf_buckling[idx] if idx < len(rf_buckling) else ""
-            save_csv_row(log_path, headers, row)
+            log.write(res.x, y, "refine", "best", fem_calls_used)
             all_results.append({
                 "x": np.copy(res.x),
                 "weight": weight,
@@ -525,9 +897,14 @@ def main():
             })
             fem_calls_used += 1
 
+    evaluator.close()
+    log.close()
+    if cache is not None:
+        cache.save()
+
     # --- Final Summary ---
     best, near_misses = find_best_and_near_misses(all_results, USER_INPUTS['target_rf'], USER_INPUTS['display_top_n'])
-    print_summary(best, near_misses, "FINISHED", "-", fem_calls_used, USER_INPUTS['fem_call_budget'])
+    print_summary(best, near_misses, "FINISHED", "-", fem_calls_used, USER_INPUTS['fem_call_budget'], cache)
     print("\n=== MIDPOINTS OF FOUND REGIONS ===")
     for i, ctr in enumerate(centers):
         print(f"Region {i+1}: {np.round(ctr,3)}")
@@ -1,4 +1,6 @@
 import math
+import warnings
+import numpy as np
 import helpers as hp
 
 
@@ -15,6 +17,10 @@ def stringer_element_volume(row, elementLength):
     return volume
 
 def crosssectional_properties_tee_skin(height_str, width_str, thickness_web, thickness_flange, thickness_skin, stringer_pitch):
+    A_tot, z_bar, I_y_bar = _tee_skin_section(height_str, width_str, thickness_web, thickness_flange, thickness_skin, stringer_pitch)
+    return A_tot, I_y_bar
+
+def _tee_skin_section(height_str, width_str, thickness_web, thickness_flange, thickness_skin, stringer_pitch):
 
     # Individual moment of inertia calculations for the skin, flange, and web of a T-stringer
     I_y_skin = (stringer_pitch * thickness_skin**3) / 12
@@ -41,7 +47,7 @@ def crosssectional_properties_tee_skin(height_str, width_str, thickness_web, thi
     contrib_web = I_y_web + (z_web-z_bar)**2 * A_web
     I_y_bar = contrib_skin + contrib_flange + contrib_web
 
-    return A_tot, I_y_bar
+    return A_tot, z_bar, I_y_bar
 
 def crosssectional_properties_hat_skin(DIM1, DIM2, DIM3, DIM4, thickness_skin, stringer_pitch, stringer_depth):
     """
@@ -52,6 +58,11 @@ def crosssectional_properties_hat_skin(DIM1, DIM2, DIM3, DIM4, thickness_skin, s
     thickness_skin: thickness of skin
     stringer_pitch: width of skin area per stringer (used in skin calc)
     """
+    I_yy, A_tot, z_bar = _hat_skin_section(DIM1, DIM2, DIM3, DIM4, thickness_skin, stringer_pitch)
+    V_tot = A_tot * stringer_depth  # Volume of the entire cross-section
+    return I_yy, A_tot, V_tot  # Return moment of inertia, area, and volume
+
+def _hat_skin_section(DIM1, DIM2, DIM3, DIM4, thickness_skin, stringer_pitch):
 
     # Area of each part
     A_skin = stringer_pitch * thickness_skin
@@ -60,8 +71,6 @@ def crosssectional_properties_hat_skin(DIM1, DIM2, DIM3, DIM4, thickness_skin, s
     A_bottom = DIM4 * DIM2
     A_tot = A_skin + A_top + 2 * A_side_web + 2 * A_bottom
 
-    V_tot = A_tot * stringer_depth  # Volume of the entire cross-section
-
     # z-coordinates (from bottom)
     z_skin = -thickness_skin / 2
     z_bottom = DIM2 / 2
@@ -90,7 +99,73 @@ def crosssectional_properties_hat_skin(DIM1, DIM2, DIM3, DIM4, thickness_skin, s
 
     I_yy = contrib_skin + contrib_top + contrib_webs + contrib_bottoms
 
-    return I_yy, A_tot, V_tot  # Return moment of inertia, area, and volume
+    return I_yy, A_tot, z_bar
+
+#Section property engine: the cross-section formulas above evaluated for whole arrays of sections.
+#Results are memoized by the dimension tuple rounded to SECTION_DECIMALS, since the same stringer
+#sections come back for every stiffener and load case of an optimizer run.
+SECTION_DECIMALS = 6
+SECTION_CACHE_SIZE = 100000
+_sectionCache = dict()
+
+def _section_batch(kind, sectionFunc, dimensions, stringer_depth):
+    dimensions = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in dimensions))
+    shape = dimensions[0].shape
+    dimensions = np.stack([value.ravel() for value in dimensions], axis=1)
+    # Group identical (quantized) sections, the first occurrence of each group is the one evaluated
+    keys, first, inverse = np.unique(np.round(dimensions, SECTION_DECIMALS), axis=0, return_index=True, return_inverse=True)
+    props = np.empty((len(keys), 3))
+    keys = [(kind,) + key for key in map(tuple, keys.tolist())]
+    missing = []
+    for i, key in enumerate(keys):
+        cached = _sectionCache.get(key)
+        if cached is None:
+            missing.append(i)
+        else:
+            props[i] = cached
+    if missing:
+        I_yy, A_tot, z_bar = sectionFunc(*dimensions[first[missing]].T)
+        props[missing, 0] = A_tot
+        props[missing, 1] = z_bar
+        props[missing, 2] = I_yy
+        for i in missing:
+            if len(_sectionCache) >= SECTION_CACHE_SIZE:
+                del _sectionCache[next(iter(_sectionCache))]   #drop the oldest entry
+            _sectionCache[keys[i]] = tuple(props[i])
+    props = props[inverse.ravel()]
+    A_tot = props[:, 0].reshape(shape)
+    I_yy = props[:, 2].reshape(shape)
+    return {
+        'A': A_tot,
+        'z_bar': props[:, 1].reshape(shape),
+        'I_yy': I_yy,
+        'r_gyr': hp.r_gyr_batch(I_yy, A_tot),
+        'V': A_tot * stringer_depth,
+    }
+
+def hat_section_batch(DIM1, DIM2, DIM3, DIM4, thickness_skin, stringer_pitch, stringer_depth):
+    """
+    Cross-section properties of skin + HAT-stringer for arrays of sections (arguments as in crosssectional_properties_hat_skin).
+
+    Returns:
+        Dictionary of arrays with area 'A', centroid 'z_bar', moment of inertia 'I_yy', radius of gyration 'r_gyr' and volume 'V'
+    """
+    return _section_batch('hat', _hat_skin_section, (DIM1, DIM2, DIM3, DIM4, thickness_skin, stringer_pitch), stringer_depth)
+
+def tee_section_batch(height_str, width_str, thickness_web, thickness_flange, thickness_skin, stringer_pitch, stringer_depth):
+    """
+    Cross-section properties of skin + T-stringer for arrays of sections (arguments as in crosssectional_properties_tee_skin).
+
+    Returns:
+        Dictionary of arrays with area 'A', centroid 'z_bar', moment of inertia 'I_yy', radius of gyration 'r_gyr' and volume 'V'
+    """
+    def teeSection(*dimensions):
+        A_tot, z_bar, I_y_bar = _tee_skin_section(*dimensions)
+        return I_y_bar, A_tot, z_bar
+    return _section_batch('tee', teeSection, (height_str, width_str, thickness_web, thickness_flange, thickness_skin, stringer_pitch), stringer_depth)
+
+def clearSectionCache():
+    _sectionCache.clear()
 
 #Column Buckling formulas 
 #Euler Buckling case 
@@ -160,54 +235,222 @@ def chooseBuckling(row, EModulus, sigma_yield):
     return sigma_crit, reserveFactor
 
 
-#Ramberg Osgood
-"""
-Ramberg-Osgood function is not functional at the moment!
-"""
-def RambergOsgoodIt(EModulus, I_y, area, length, sigma_applied, sigma_02, sigma_u, epsilon_u, c=1, tol=0.001):
-    lmd = hp.lmd(I_y, area, length, c)
-    n = math.log(epsilon_u / 0.002) / math.log(sigma_u / sigma_02) # exponent
+#Batch versions of the column buckling formulas, working on NumPy arrays of stiffeners instead of single rows
+def _crippling_factor(x):
+    #Scaling factor alpha for the crippling-affected part, 0 where the part cannot cripple (x < 0.4)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.select([(0.4 <= x) & (x <= 1.095), (1.095 < x) & (x <= 1.633), 1.633 < x],
+                         [1.4-0.628*x, 0.78/x, 0.69/x**0.75], default=0)
 
-    # Start from the applied stress (initial)
-    sigma_crit = sigma_applied
-    step = 0.2  # Initial step size
-    direction = -1  # 1 for increasing, -1 for decreasing (This is arbitrary tbh)
+def sigma_crip_batch(EModulus, DIM1, DIM2, DIM3, sigma_yield, r=0):
+    """
+    Vectorised sigma_crip, DIM1, DIM2, DIM3 and r can be scalars or arrays.
+    The if/elif regimes become np.select, results match sigma_crip up to floating point rounding.
+    """
+    DIM1, DIM2, DIM3, r = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (DIM1, DIM2, DIM3, r)))
+    ki = 3.6   #Support factor for relevant parts of stringer
+    #Effective width and slenderness of the crippling-affected parts of the HAT-stringer
+    b1 = DIM1 - DIM2/2*(1 - 0.2*(r**2/DIM2**2))
+    b2 = DIM3 - DIM2*(1 - 0.2*(r**2/DIM2**2))
+    x1 = b1/DIM2 * np.sqrt(sigma_yield/(ki*EModulus))
+    x2 = b2/DIM2 * np.sqrt(sigma_yield/(ki*EModulus))
+    alpha1 = _crippling_factor(x1)
+    alpha2 = _crippling_factor(x2)
+    sigma_crippling1 = alpha1 * sigma_yield
+    sigma_crippling2 = alpha2 * sigma_yield
+    #Same component cases as in sigma_crip: both, only 1, only 2 or none of the parts can cripple
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_crippling = np.select([(alpha1 != 0) & (alpha2 != 0), (alpha2 == 0) & (alpha1 != 0), (alpha1 == 0) & (alpha2 != 0)],
+                                    [(2*sigma_crippling1*b1 + sigma_crippling2*b2)/(2*b1 + b2), sigma_crippling1, sigma_crippling2],
+                                    default=sigma_yield)
+    return np.minimum(sigma_crippling, sigma_yield)
+
+def EulerBuckling_batch(lmd, sigma_applied, EModulus):
+    lmd = np.asarray(lmd, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_crit = math.pi**2 * EModulus/(lmd**2)
+        reserveFactor = sigma_crit/(1.5*np.asarray(sigma_applied, dtype=float))
+    return sigma_crit, np.abs(reserveFactor)
+
+def EulerJohnson_batch(lmd, sigma_crip, sigma_applied, EModulus):
+    lmd = np.asarray(lmd, dtype=float)
+    sigma_cutoff = np.asarray(sigma_crip, dtype=float)
+    sigma_crit = sigma_cutoff - 1/EModulus*(sigma_cutoff/(2*math.pi))**2 * lmd**2 # interpolate crictical stress
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reserveFactor = sigma_crit/(1.5*np.asarray(sigma_applied, dtype=float))
+    return sigma_crit, np.abs(reserveFactor)
 
-    while True:
-        # Compute tangent modulus at current stress
-        denom = 1 + 0.002 * n * (EModulus / sigma_02) * ((sigma_crit / sigma_02) ** (n - 1))
-        Et = EModulus / denom
+def chooseBuckling_batch(lmd, lambda_crit, sigma_crip, sigma_applied, EModulus):
+    """
+    Vectorised chooseBuckling: Euler where lambda > lambda_crit, Euler-Johnson otherwise.
 
-        # Compute critical stress from updated tangent modulus
-        sigma_new = (math.pi**2 * Et) / (lmd**2)
+    Returns:
+        sigma_crit, reserveFactor arrays
+    """
+    sigma_crit_euler, reserveFactor_euler = EulerBuckling_batch(lmd, sigma_applied, EModulus)
+    sigma_crit_johnson, reserveFactor_johnson = EulerJohnson_batch(lmd, sigma_crip, sigma_applied, EModulus)
+    euler = np.asarray(lmd) > np.asarray(lambda_crit)
+    return np.where(euler, sigma_crit_euler, sigma_crit_johnson), np.where(euler, reserveFactor_euler, reserveFactor_johnson)
 
-        diff = sigma_new - sigma_crit
+# Batch replacement for the sigma_crip, lambda_crit, lambda, r_gyr and chooseBuckling apply passes of task 1f
+def columnBuckBatch(df, EModulus, sigma_yield, length, r=0, c=1):
+    """
+    Column buckling of a whole stiffener table in one call.
+
+    Args:
+        df: DataFrame with 'dim1', 'dim2', 'dim3', 'I_yy', 'areaTot' and 'sigma_XX_avg' columns
+        EModulus, sigma_yield: material values
+        length: column length of the stiffeners
+        r: corner radius for the crippling calculation
+        c: end fixity factor for lambda
 
-        # For overshot, reverse direction *-1 and reduce step size by 50%
-        if direction * diff < 0:
-            step *= 0.5
-            direction *= -1
+    Returns:
+        Dictionary of arrays with 'sigma_crip', 'lambda_crit', 'lambda', 'r_gyr', 'sigma_crit' and 'Reserve Factor'
+    """
+    sigmaCrip = sigma_crip_batch(EModulus, df['dim1'].to_numpy(), df['dim2'].to_numpy(), df['dim3'].to_numpy(), sigma_yield, r)
+    lambdaCrit = hp.lambda_crit_batch(EModulus, sigmaCrip, sigma_yield)
+    lmd = hp.lmd_batch(df['I_yy'].to_numpy(), df['areaTot'].to_numpy(), length, c)
+    sigmaCrit, reserveFactor = chooseBuckling_batch(lmd, lambdaCrit, sigmaCrip, df['sigma_XX_avg'].to_numpy(), EModulus)
+    return {
+        'sigma_crip': sigmaCrip,
+        'lambda_crit': lambdaCrit,
+        'lambda': lmd,
+        'r_gyr': hp.r_gyr_batch(df['I_yy'].to_numpy(), df['areaTot'].to_numpy()),
+        'sigma_crit': sigmaCrit,
+        'Reserve Factor': reserveFactor,
+    }
 
-        # Update sigma_crit
-        sigma_crit = sigma_crit + direction * step * abs(diff)
 
-        # Break out, if diff between sigma_new and sigma_crit is smaller than tol=0.01
-        if abs(diff) < tol:
+#Ramberg Osgood
+#Inelastic column buckling with the tangent modulus of the Ramberg-Osgood curve: sigma_crit is the root of
+#    f(sigma) = pi^2 * Et(sigma) / lambda^2 - sigma
+#Et falls with sigma, so f is strictly decreasing and the root lies between 0 and the Euler stress pi^2*E/lambda^2.
+#The solver takes Newton steps and falls back to bisection whenever a step would leave this bracket or
+#does not shrink the residual fast enough (the steep part of the curve above sigma_02), like rtsafe.
+def _RambergOsgood_residual(sigma, EModulus, lmd, sigma_02, n):
+    # Tangent modulus and its derivative at the current stress
+    g = 0.002 * n * (EModulus / sigma_02) * ((sigma / sigma_02) ** (n - 1))
+    Et = EModulus / (1 + g)
+    dEt = -EModulus * g * (n - 1) / (sigma * (1 + g)**2)
+    f = (math.pi**2 * Et) / (lmd**2) - sigma
+    df = (math.pi**2 * dEt) / (lmd**2) - 1
+    return f, df, Et
+
+def RambergOsgoodIt(EModulus, I_y, area, length, sigma_applied, sigma_02, sigma_u, epsilon_u, c=1, tol=0.001, maxiter=50, full_output=False):
+    """
+    Critical stress of inelastic column buckling with the Ramberg-Osgood tangent modulus.
+
+    Args:
+        EModulus, I_y, area, length, c: column as in helpers.lmd
+        sigma_applied: applied stress for the reserve factor
+        sigma_02, sigma_u, epsilon_u: Ramberg-Osgood material parameters
+        tol: stress tolerance on the residual and on the bracket width
+        maxiter: maximum number of iterations
+        full_output: also return a dictionary with 'iterations', 'converged', 'residual' and 'Et'
+
+    Returns:
+        sigma_crit, reserveFactor (and the diagnostics dictionary for full_output)
+    """
+    lmd = hp.lmd(I_y, area, length, c)
+    n = math.log(epsilon_u / 0.002) / math.log(sigma_u / sigma_02) # exponent
+
+    # Bracket between 0 and the Euler stress, start from the Euler stress
+    lower = 0.0
+    upper = (math.pi**2 * EModulus) / (lmd**2)
+    sigma_crit = upper
+    step = stepOld = upper - lower
+    converged = False
+    for iteration in range(1, maxiter + 1):
+        f, df, Et = _RambergOsgood_residual(sigma_crit, EModulus, lmd, sigma_02, n)
+        if abs(f) < tol:
+            converged = True
+            break
+        # Shrink the bracket, f is positive left of the root
+        if f > 0:
+            lower = sigma_crit
+        else:
+            upper = sigma_crit
+        sigma_new = sigma_crit - f / df
+        stepOld = step
+        # Bisect if the Newton step leaves the bracket or converges too slowly
+        if not lower < sigma_new < upper or abs(2 * f) > abs(stepOld * df):
+            step = 0.5 * (upper - lower)
+            sigma_crit = lower + step
+        else:
+            step = f / df
+            sigma_crit = sigma_new
+        if upper - lower < tol:
+            f, df, Et = _RambergOsgood_residual(sigma_crit, EModulus, lmd, sigma_02, n)
+            converged = True
             break
 
+    if not converged:
+        warnings.warn(f"RambergOsgoodIt did not converge in {maxiter} iterations (residual {f:.3g})", RuntimeWarning)
     reserveFactor = sigma_crit / sigma_applied
+    if full_output:
+        return sigma_crit, reserveFactor, {'iterations': iteration, 'converged': converged, 'residual': f, 'Et': Et}
     return sigma_crit, reserveFactor #return(critical stress, reserve factor)
 
+def RambergOsgood_batch(EModulus, lmd, sigma_applied, sigma_02, sigma_u, epsilon_u, tol=0.001, maxiter=50):
+    """
+    Vectorised RambergOsgoodIt, solving sigma_crit for an array of stiffeners at once.
+
+    Args:
+        EModulus: Young's modulus
+        lmd: slenderness of the stiffeners (e.g. from helpers.lmd_batch)
+        sigma_applied: applied stresses for the reserve factors
+        sigma_02, sigma_u, epsilon_u: Ramberg-Osgood material parameters (scalars or arrays)
+        tol, maxiter: as in RambergOsgoodIt
+
+    Returns:
+        sigma_crit, reserveFactor and a dictionary with per stiffener 'iterations', 'converged', 'residual' and 'Et'
+    """
+    lmd, sigma_applied, sigma_02, sigma_u, epsilon_u = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (lmd, sigma_applied, sigma_02, sigma_u, epsilon_u)))
+    n = np.log(epsilon_u / 0.002) / np.log(sigma_u / sigma_02) # exponent
+
+    lower = np.zeros(lmd.shape)
+    upper = (math.pi**2 * EModulus) / (lmd**2)
+    sigma_crit = upper.copy()
+    step = upper - lower
+    iterations = np.zeros(lmd.shape, dtype=int)
+    converged = np.zeros(lmd.shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f, df, Et = _RambergOsgood_residual(sigma_crit, EModulus, lmd, sigma_02, n)
+        for iteration in range(maxiter):
+            active = ~converged
+            if not active.any():
+                break
+            iterations[active] += 1
+            converged |= np.abs(f) < tol
+            active = ~converged
+            lower = np.where(active & (f > 0), sigma_crit, lower)
+            upper = np.where(active & (f <= 0), sigma_crit, upper)
+            sigma_new = sigma_crit - f / df
+            newton = (lower < sigma_new) & (sigma_new < upper) & (np.abs(2 * f) <= np.abs(step * df))
+            step = np.where(active, np.where(newton, f / df, 0.5 * (upper - lower)), step)
+            sigma_crit = np.where(active, np.where(newton, sigma_new, lower + step), sigma_crit)
+            converged |= upper - lower < tol
+            f, df, Et = _RambergOsgood_residual(sigma_crit, EModulus, lmd, sigma_02, n)
+        reserveFactor = sigma_crit / sigma_applied
+    if not converged.all():
+        warnings.warn(f"RambergOsgood_batch did not converge for {np.count_nonzero(~converged)} stiffeners in {maxiter} iterations", RuntimeWarning)
+    return sigma_crit, reserveFactor, {'iterations': iterations, 'converged': converged, 'residual': f, 'Et': Et}
+
 #Test cases for the formula 
 if __name__ == '__main__':
     # Example usage of crosssectional_properties_hat_skin
     crossecProp = crosssectional_properties_hat_skin(DIM1=25, DIM2=2, DIM3=20, DIM4=15, thickness_skin=4, stringer_pitch=200, stringer_depth=750/3)
     print(f"Area: {crossecProp[1]}, Moment of Inertia: {crossecProp[0]}, Volume: {crossecProp[2]}")
 
-    # Example usage of RambergOsgoodIt
-    res = RambergOsgoodIt(EModulus=72000, I_y=crossecProp[1], area=crossecProp[0], length=600, sigma_applied=200, sigma_02=280, sigma_u=350, epsilon_u=0.1)
-    # we expect arround: Et=64605, sigma_crit=218.9, reserveFactor=0.78
-    print(res)
+    # Example usage of RambergOsgoodIt, length 300 gives slenderness 45.4 (Euler stress 345.4 above sigma_02: inelastic range)
+    sigma_crit, reserveFactor, info = RambergOsgoodIt(EModulus=72000, I_y=crossecProp[0], area=crossecProp[1], length=300, sigma_applied=200,
+                                                      sigma_02=280, sigma_u=350, epsilon_u=0.1, full_output=True)
+    # we expect arround: Et=48845, sigma_crit=234.30, reserveFactor=1.17 (root of sigma = pi^2 Et(sigma) / slenderness^2)
+    Et_expect = 48845
+    sigma_crit_expect = 234.30
+    print(f"Et: {info['Et']}, sigma_crit: {sigma_crit}, reserveFactor: {reserveFactor}, iterations: {info['iterations']}")
+    print('The test status is thus: '+str(abs(info['Et'] - Et_expect) < 1 and abs(sigma_crit - sigma_crit_expect) < 0.01))
 
     #Example for Euler Crippling 
     #sigma_crit, reserveFactor = EulerJohnson(EModulus=72000, I_y = 79820.4, area=646, length=600, height_str=45, thickness_flange=3, thickness_web=3, radius = 2, sigma_yield=280, sigma_applied=200)
@@ -1,5 +1,7 @@
 import math
+import numpy as np
 import columnbuckling as colbuckl
+from topology import Topology
 
 def lmd(I_y, area, length, c=1):
     r = math.sqrt(I_y/area) 
@@ -13,6 +15,18 @@ def lambda_crit(EModulus, sigma_crip, sigma_yield):
 def r_gyr(I_y, area):
     return math.sqrt(I_y / area)
 
+#Array versions of lmd, lambda_crit and r_gyr
+def lmd_batch(I_y, area, length, c=1):
+    r = np.sqrt(np.asarray(I_y, dtype=float)/np.asarray(area, dtype=float))
+    return (c*length)/r
+
+def lambda_crit_batch(EModulus, sigma_crip, sigma_yield):
+    sigma_cutoff = np.minimum(np.asarray(sigma_crip, dtype=float), sigma_yield)
+    return np.sqrt(2*(math.pi**2) * EModulus / sigma_cutoff)
+
+def r_gyr_batch(I_y, area):
+    return np.sqrt(np.asarray(I_y, dtype=float) / np.asarray(area, dtype=float))
+
 def crosssectional_properties_tee_skin_row(row):
     return colbuckl.crosssectional_properties_tee_skin(
         height_str=row['height_str'],
@@ -34,6 +48,31 @@ def crosssectional_properties_hat_skin_row(row, stringer_pitch, stringer_depth):
         stringer_depth=stringer_depth
     )
 
+# Whole-table versions of the row helpers above, column names as used in task 1f
+def crosssectional_properties_hat_skin_frame(df, stringer_pitch, stringer_depth):
+    props = colbuckl.hat_section_batch(
+        DIM1=df['dim1'].to_numpy(),
+        DIM2=df['dim2'].to_numpy(),
+        DIM3=df['dim3'].to_numpy(),
+        DIM4=df['dim4'].to_numpy(),
+        thickness_skin=df['thickness'].to_numpy(),
+        stringer_pitch=stringer_pitch,
+        stringer_depth=stringer_depth
+    )
+    return {'I_yy': props['I_yy'], 'areaTot': props['A'], 'VolumeTot': props['V'], 'z_bar': props['z_bar'], 'r_gyr': props['r_gyr']}
+
+def crosssectional_properties_tee_skin_frame(df, stringer_depth):
+    props = colbuckl.tee_section_batch(
+        height_str=df['height_str'].to_numpy(),
+        width_str=df['width_str'].to_numpy(),
+        thickness_web=df['thickness_web'].to_numpy(),
+        thickness_flange=df['thickness_flange'].to_numpy(),
+        thickness_skin=df['thickness_skin'].to_numpy(),
+        stringer_pitch=df['stringer_pitch'].to_numpy(),
+        stringer_depth=stringer_depth
+    )
+    return {'I_yy': props['I_yy'], 'areaTot': props['A'], 'VolumeTot': props['V'], 'z_bar': props['z_bar'], 'r_gyr': props['r_gyr']}
+
 
 
 def personal_data_provider(name):
@@ -76,6 +115,69 @@ def add_component_names_to_elements(df, component_mapping_df, element_id_column=
     
     return df
 
+def stiffener_topology(component_mapping_df, element_id_column='Element ID', component_name_column='Component Name'):
+    """
+    Map every element to the stiffener(s) it belongs to. Stiffener i consists of stringer i and the panels i and i+1
+    on both sides of it, so a panel between two stringers appears once for each of the two stiffeners.
+
+    Args:
+        component_mapping_df: Mapping dataframe containing element ID to component name (panelN / stringerN) matches
+        element_id_column: Column name for element ID
+        component_name_column: Column name for component name
+
+    Returns:
+        DataFrame with element ID and 'Stiffener' columns, stiffeners as categorical ordered by their number
+    """
+    return Topology.from_frames(component_mapping_df, element_id_column=element_id_column,
+                                component_name_column=component_name_column).stiffener_table(element_id_column)
+
+def stack_loadcases(df, value_columns, element_column='Element ID', loadcase_column='Load Case'):
+    """
+    Reshape a long stress table (one row per element and load case) into element x load case matrices.
+
+    Args:
+        df: Stress dataframe, the element column may also be the index
+        value_columns: Columns to stack, e.g. ['sigmaXX', 'sigmaYY', 'sigmaXY']
+        element_column: Column name for element ID
+        loadcase_column: Column name for load case
+
+    Returns:
+        Sorted element IDs, sorted load cases and a dictionary with one (element x load case) array per value column,
+        NaN where an element has no row for a load case
+    """
+    def column(name):
+        return df[name].to_numpy() if name in df.columns else df.index.get_level_values(name).to_numpy()
+
+    elements, elementIndex = np.unique(column(element_column), return_inverse=True)
+    loadcases, loadcaseIndex = np.unique(column(loadcase_column), return_inverse=True)
+    stacked = dict()
+    for name in value_columns:
+        # Keep float32 stresses float32
+        values = np.full((len(elements), len(loadcases)), np.nan, dtype=np.result_type(column(name).dtype, np.float32))
+        values[elementIndex, loadcaseIndex] = column(name)
+        stacked[name] = values
+    return elements, loadcases, stacked
+
+def widen_loadcases(df, column_names, loadcase_level='Loadcase'):
+    """
+    Turn a result table indexed by (load case, component) into one row per component with a block of columns per load case.
+
+    Args:
+        df: Result dataframe with the load case as one index level
+        column_names: Dictionary column -> output name with a {loadcase} placeholder, e.g. {'Reserve Factor': 'LC {loadcase} RF'}.
+            Its order is the column order inside every load case block.
+        loadcase_level: Name of the load case index level
+
+    Returns:
+        DataFrame with the remaining index levels as index
+    """
+    wide = df[list(column_names)].unstack(loadcase_level)
+    loadcases = wide.columns.get_level_values(loadcase_level).unique()
+    columns = [(column, loadcase) for loadcase in loadcases for column in column_names]
+    wide = wide[columns]
+    wide.columns = [column_names[column].format(loadcase=loadcase) for column, loadcase in columns]
+    return wide
+
 #Running test on all functions 
 if __name__ == '__main__':
     print(lmd(I_y=79820.37, area=646, length=600, c=1), "and expected: 53.97")
\ No newline at end of file
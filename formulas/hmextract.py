@@ -0,0 +1,168 @@
+"""
+Extraction of the panel, mass and stringer property tables from a HyperMesh model.
+
+Every backend gives the model attributes as columns (dictionaries of NumPy arrays), extract_tables builds all
+property tables from them in one pass and write_tables writes them in the format of assets/script_test.py.
+
+Backends:
+    HmBackend: the HyperMesh Python API (hm). Only id and mass are read for every element, thickness only for the
+        elements of the panel components (collected per component through FilterByCollection, so the component of an
+        element is never read)
+    CsvBackend: a stand-in model built from the data/{name} csv files, for testing and benchmarking without HyperMesh
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import loaders
+
+#Component ids of the panels in the HyperMesh model
+PANEL_COMPONENTS = range(1, 11)
+
+
+class HmBackend:
+    """
+    Reads the model through the hm API in one pass per collection. The hm API gives the attributes entity by entity,
+    so the work is kept to what the tables need: id and mass of all elements, id and thickness of the panel elements
+    only.
+    """
+    def __init__(self, model=None):
+        import hm
+        import hm.entities as ent
+        self.hm = hm
+        self.ent = ent
+        self.model = hm.Model() if model is None else model
+
+    def elements(self):
+        rows = [(element.id, element.mass) for element in self.hm.Collection(self.model, self.ent.Element)]
+        return _columns(rows, [('id', np.int64), ('mass', np.float64)])
+
+    def panel_elements(self, panel_components=PANEL_COMPONENTS):
+        # One filtered collection per panel component, the component id is known from the loop
+        elementFilter = self.hm.FilterByCollection(self.ent.Element, self.ent.Component)
+        rows = []
+        for componentId in panel_components:
+            component = self.hm.Collection(self.model, self.ent.Component, f"id={componentId}")
+            rows.extend((element.id, componentId, element.thickness) for element in self.hm.Collection(self.model, elementFilter, component))
+        columns = _columns(rows, [('id', np.int64), ('component', np.int64), ('thickness', np.float64)])
+        order = np.argsort(columns['id'], kind='stable')
+        return {name: values[order] for name, values in columns.items()}
+
+    def components(self):
+        rows = [(component.id, component.name) for component in self.hm.Collection(self.model, self.ent.Component)]
+        return _columns(rows, [('id', np.int64), ('name', object)])
+
+    def beam_sections(self):
+        rows = [(beamsection.id, beamsection.beamsect_dim1, beamsection.beamsect_dim2, beamsection.beamsect_dim3, beamsection.beamsect_dim4)
+                for beamsection in self.hm.Collection(self.model, self.ent.Beamsection)]
+        return _columns(rows, [('id', np.int64), ('dim1', np.float64), ('dim2', np.float64), ('dim3', np.float64), ('dim4', np.float64)])
+
+
+class CsvBackend:
+    """
+    Stand-in model from data/{name}: element masses, panel thicknesses, element-component matching and beam sections.
+
+    Components get the ids of the HyperMesh model (panel1-10 -> 1-10, then the stringers in file order), elements
+    without a component go to a component 'other'. repeat > 1 copies the model with shifted element ids, to get
+    models of realistic size for benchmarks.
+    """
+    def __init__(self, name_dir, data_dir=None, repeat=1, cache=True):
+        if data_dir is None:
+            data_dir = os.path.dirname(os.path.abspath(name_dir))
+        self.name_dir = name_dir
+        self.repeat = repeat
+        masses = loaders.read_element_masses(name_dir, cache)
+        matching = loaders.read_component_matching(data_dir, cache)
+        thickness = loaders.read_panel_properties(name_dir, cache).set_index('Element ID')['thickness']
+
+        names = list(dict.fromkeys(matching['Component Name']))
+        names.append('other')
+        self.componentIds = pd.Series(np.arange(1, len(names) + 1), index=names)
+        # The names are categorical (loaders.COMPONENT_MATCHING_SCHEMA), 'other' is not one of the categories
+        componentName = masses['elements'].map(matching.set_index('Element ID')['Component Name'].astype(object)).fillna('other')
+        self.elementIds = masses['elements'].to_numpy(np.int64)
+        self.elementComponents = self.componentIds[componentName].to_numpy(np.int64)
+        self.elementMasses = masses['mass'].to_numpy(np.float64)
+        self.elementThickness = masses['elements'].map(thickness).to_numpy(np.float64)
+        self.beamsections = pd.read_csv(os.path.join(name_dir, 'stringer_properties.csv'))
+
+    def _ids(self):
+        offsets = np.repeat(np.arange(self.repeat) * self.elementIds.max(), len(self.elementIds))
+        return np.tile(self.elementIds, self.repeat) + offsets
+
+    def elements(self):
+        return {'id': self._ids(), 'mass': np.tile(self.elementMasses, self.repeat)}
+
+    def panel_elements(self, panel_components=PANEL_COMPONENTS):
+        component = np.tile(self.elementComponents, self.repeat)
+        isPanel = np.isin(component, panel_components)
+        return {'id': self._ids()[isPanel], 'component': component[isPanel], 'thickness': np.tile(self.elementThickness, self.repeat)[isPanel]}
+
+    def components(self):
+        return {'id': self.componentIds.to_numpy(np.int64), 'name': self.componentIds.index.to_numpy(object)}
+
+    def beam_sections(self):
+        columns = {'id': self.beamsections['beamsects'].to_numpy(np.int64)}
+        for i in range(1, 5):
+            columns[f'dim{i}'] = self.beamsections[f'beamsect_dim{i}'].to_numpy(np.float64)
+        return columns
+
+
+def _columns(rows, fields):
+    # List of row tuples -> dictionary of column arrays
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return {name: np.array(values, dtype=dtype) for (name, dtype), values in zip(fields, columns)}
+
+def extract_tables(backend, panel_components=PANEL_COMPONENTS):
+    """
+    Property tables of the model, as written by assets/script_test.py.
+
+    Args:
+        backend: HmBackend, CsvBackend or any object with elements, panel_elements, components and beam_sections
+        panel_components: Component ids of the panels
+
+    Returns:
+        Dictionary file name -> DataFrame for panel_properties, element_masses and stringer_properties
+    """
+    elements = backend.elements()
+    panelElements = backend.panel_elements(panel_components)
+    components = backend.components()
+    # Component id -> name and element id -> mass for all panel elements at once
+    order = np.argsort(components['id'])
+    componentName = components['name'][order[np.searchsorted(components['id'], panelElements['component'], sorter=order)]]
+    order = np.argsort(elements['id'])
+    panelMass = elements['mass'][order[np.searchsorted(elements['id'], panelElements['id'], sorter=order)]]
+
+    panelPropertiesdf = pd.DataFrame({
+        'Element ID': panelElements['id'],
+        'Component Name': componentName,
+        'thickness': panelElements['thickness'],
+        'mass': panelMass,
+    }).set_index('Element ID')
+    massDf = pd.DataFrame({'Element ID': elements['id'], 'mass': elements['mass']}).set_index('Element ID')
+
+    sections = backend.beam_sections()
+    stringerPropertiesDf = pd.DataFrame({
+        'beamsects': sections['id'],
+        'beamsect_dim1': sections['dim1'],
+        'beamsect_dim2': sections['dim2'],
+        'beamsect_dim3': sections['dim3'],
+        'beamsect_dim4': sections['dim4'],
+    })
+    stringerPropertiesDf = stringerPropertiesDf.dropna().set_index('beamsects')
+    return {'panel_properties': panelPropertiesdf, 'element_masses': massDf, 'stringer_properties': stringerPropertiesDf}
+
+def write_tables(tables, output_dir='.'):
+    """
+    Write the tables of extract_tables as {name}.csv to output_dir.
+
+    Returns:
+        List of written files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        paths.append(os.path.join(output_dir, name + '.csv'))
+        df.to_csv(paths[-1])
+    return paths
@@ -0,0 +1,317 @@
+"""
+Loaders for the FEM exports and property files in data/.
+
+Every loader normalizes its file (renames, dropped columns) the same way the notebooks do, with the column types
+declared in the *_SCHEMA dictionaries (int32 ids, categorical load cases and names). The normalized table is
+cached as a columnar .npz file in a .cache folder next to the source. A cached table is used as long as the source
+has the same size and modification time, or, if those changed, the same content hash. Otherwise the source is
+read again and the cache is rewritten.
+
+read_strs_stresses gives the same panel and stringer stress tables straight from an OptiStruct .strs file, as float64
+without going through the exported csv files.
+"""
+import os
+import json
+import zlib
+import hashlib
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+import strsfile
+import topology
+from topology import Topology
+
+#Bump when a loader changes its normalization, so old cache files are not used anymore
+CACHE_VERSION = 2
+CACHE_DIR_NAME = '.cache'
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def cache_path(path, loader_name):
+    path = os.path.abspath(path)
+    key = hashlib.sha1(f'{loader_name}:{path}'.encode()).hexdigest()[:16]
+    return os.path.join(os.path.dirname(path), CACHE_DIR_NAME, f'{os.path.basename(path)}.{loader_name}.{key}.npz')
+
+def _save_frame(target, df, meta):
+    arrays = dict()
+    kinds = []
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        missing = values.isna().to_numpy()
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Codes and categories, -1 codes are missing values
+            arrays[f'column{i}'] = values.cat.codes.to_numpy()
+            categories = values.cat.categories.to_numpy()
+            arrays[f'categories{i}'] = categories if categories.dtype.kind in 'biufcM' else categories.astype(str)
+            kinds.append('ordered' if values.cat.ordered else 'category')
+        elif values.dtype.kind in 'biufcM':
+            arrays[f'column{i}'] = values.to_numpy()
+            kinds.append('values')
+        else:
+            # Strings and other objects are stored as fixed width unicode with a mask for missing values
+            arrays[f'column{i}'] = values.astype(str).to_numpy().astype(str)
+            kinds.append('values')
+            if missing.any():
+                arrays[f'missing{i}'] = missing
+    meta = dict(meta, columns=[str(column) for column in df.columns], kinds=kinds)
+    arrays['meta'] = np.array(json.dumps(meta))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Unique name, several worker processes may write the same cache file at once
+    temporary = f'{target}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temporary, target)
+
+def _load_frame(target):
+    with np.load(target, allow_pickle=False) as npz:
+        meta = json.loads(str(npz['meta']))
+        data = dict()
+        for i, column in enumerate(meta['columns']):
+            values = npz[f'column{i}']
+            if meta['kinds'][i] != 'values':
+                values = pd.Categorical.from_codes(values, categories=npz[f'categories{i}'], ordered=meta['kinds'][i] == 'ordered')
+            elif f'missing{i}' in npz.files:
+                values = values.astype(object)
+                values[npz[f'missing{i}']] = None
+            data[column] = values
+    return pd.DataFrame(data, columns=meta['columns']), meta
+
+def _read_meta(target):
+    with np.load(target, allow_pickle=False) as npz:
+        return json.loads(str(npz['meta']))
+
+#Errors of a corrupt or truncated cache file (np.load of a broken npz raises BadZipFile, zlib.error or EOFError)
+CACHE_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile, zlib.error)
+
+def cached_read(path, loader_name, reader, cache=True):
+    """
+    Read path with reader(path) -> DataFrame, going through the columnar cache.
+
+    Args:
+        path: Source file
+        loader_name: Name of the normalization, part of the cache key
+        reader: Function reading and normalizing the source file
+        cache: False reads the source directly and leaves the cache alone
+
+    Returns:
+        Normalized DataFrame
+    """
+    if not cache:
+        return reader(path)
+    target = cache_path(path, loader_name)
+    stat = os.stat(path)
+    meta = None
+    if os.path.isfile(target):
+        try:
+            meta = _read_meta(target)
+        except CACHE_ERRORS:
+            meta = None
+    sha = None
+    if meta is not None and meta.get('version') == CACHE_VERSION:
+        try:
+            if meta['size'] == stat.st_size and meta['mtime_ns'] == stat.st_mtime_ns:
+                return _load_frame(target)[0]
+            # Touched but possibly unchanged file, compare the content
+            sha = file_hash(path)
+            if meta['sha256'] == sha:
+                df = _load_frame(target)[0]
+                _save_frame(target, df, dict(meta, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+                return df
+        except CACHE_ERRORS:
+            # Corrupt or truncated cache, rebuilt from the source below
+            pass
+    if sha is None:
+        sha = file_hash(path)
+    df = reader(path)
+    _save_frame(target, df, {'version': CACHE_VERSION, 'source': os.path.abspath(path), 'loader': loader_name,
+                             'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha})
+    return df
+
+
+#Declared schemas of the normalized tables, source column -> (column name, dtype). Only the listed columns are read.
+#STRESS columns are float64 unless a loader is asked for float32, LOADCASE columns become ordered categoricals.
+STRESS = 'stress'
+LOADCASE = 'loadcase'
+
+PANEL_STRESS_SCHEMA = {
+    'Elements': ('Element ID', np.int32),
+    'Loadcase': ('Loadcase', LOADCASE),
+    'XX': ('sigmaXX', STRESS),
+    'XY': ('sigmaXY', STRESS),
+    'YY': ('sigmaYY', STRESS),
+}
+STRINGER_STRESS_SCHEMA = {
+    'Elements': ('Element ID', np.int32),
+    'Loadcase': ('Loadcase', LOADCASE),
+    'Element Stresses (1D):CBAR/CBEAM Axial Stress': ('sigmaXX', STRESS),
+}
+PANEL_PROPERTY_SCHEMA = {
+    'Element ID': ('Element ID', np.int32),   #some sheets call it 'elements'
+    'thickness': ('thickness', np.float64),
+    'mass': ('mass', np.float64),
+}
+STRINGER_PROPERTY_SCHEMA = {
+    'beamsects': ('Component Name', np.int32),   #turned into categorical stringerN names
+    'beamsect_dim1': ('dim1', np.float64),
+    'beamsect_dim2': ('dim2', np.float64),
+    'beamsect_dim3': ('dim3', np.float64),
+    'beamsect_dim4': ('dim4', np.float64),
+}
+COMPONENT_MATCHING_SCHEMA = {
+    'Element ID': ('Element ID', np.int32),
+    'Component Name': ('Component Name', 'category'),
+}
+STRINGER_MATCHING_SCHEMA = {
+    'element_id': ('element_id', np.int32),
+    'stringer_id': ('stringer_id', np.int32),
+}
+ELEMENT_MASS_SCHEMA = {
+    'elements': ('elements', np.int32),
+    'mass': ('mass', np.float64),
+}
+
+
+def loadcase_categorical(values):
+    # Ordered categorical of the load case numbers, so sorting, min and max follow the numbers
+    values = np.asarray(values)
+    return pd.Categorical(values, categories=np.unique(values), ordered=True)
+
+def _read_dtypes(schema, stress_dtype):
+    # dtype argument for the csv/excel readers
+    dtypes = dict()
+    for source, (name, dtype) in schema.items():
+        dtypes[source] = stress_dtype if dtype is STRESS else np.int32 if dtype is LOADCASE else dtype
+    return dtypes
+
+def apply_schema(df, schema, stress_dtype=np.float64):
+    """
+    Rename the columns of df to the schema names and convert them to the schema dtypes, other columns are dropped.
+    """
+    df = df[list(schema)].rename(columns={source: name for source, (name, dtype) in schema.items()})
+    for name, dtype in schema.values():
+        if dtype is LOADCASE:
+            df[name] = loadcase_categorical(df[name])
+        else:
+            df[name] = df[name].astype(stress_dtype if dtype is STRESS else dtype)
+    return df
+
+def _read_csv(path, schema, stress_dtype=np.float64, **kwargs):
+    df = pd.read_csv(path, usecols=list(schema), dtype=_read_dtypes(schema, stress_dtype), **kwargs)
+    return apply_schema(df, schema, stress_dtype)
+
+
+#Normalizations, as in the notebooks
+def _panel_stresses(path, stress_dtype):
+    return _read_csv(path, PANEL_STRESS_SCHEMA, stress_dtype)
+
+def _stringer_stresses(path, stress_dtype):
+    return _read_csv(path, STRINGER_STRESS_SCHEMA, stress_dtype)
+
+def _panel_properties(path):
+    # Small file, read whole (usecols does not work with the index column of these sheets) and pruned afterwards
+    panelPropertiesdf = pd.read_excel(path).rename(columns={'elements': 'Element ID'})
+    return apply_schema(panelPropertiesdf, PANEL_PROPERTY_SCHEMA)
+
+def _stringer_properties(path):
+    stringerPropertiesdf = pd.read_csv(path, usecols=list(STRINGER_PROPERTY_SCHEMA), dtype=_read_dtypes(STRINGER_PROPERTY_SCHEMA, np.float64))
+    # Keep the column order of the file
+    stringerPropertiesdf = apply_schema(stringerPropertiesdf, STRINGER_PROPERTY_SCHEMA)[[STRINGER_PROPERTY_SCHEMA[source][0] for source in stringerPropertiesdf.columns]]
+    stringerPropertiesdf['Component Name'] = ('stringer' + stringerPropertiesdf['Component Name'].astype(str)).astype('category')
+    return stringerPropertiesdf
+
+def _component_matching(path):
+    return _read_csv(path, COMPONENT_MATCHING_SCHEMA, encoding='utf-8-sig')
+
+def _stringer_matching(path):
+    return _read_csv(path, STRINGER_MATCHING_SCHEMA, encoding='utf-8-sig')
+
+def _element_masses(path):
+    return _read_csv(path, ELEMENT_MASS_SCHEMA)
+
+
+def read_panel_stresses(name_dir, cache=True, stress_dtype=np.float64):
+    return cached_read(os.path.join(name_dir, 'panel_v2.csv'), f'panel_stresses_{np.dtype(stress_dtype).name}',
+                       lambda path: _panel_stresses(path, stress_dtype), cache)
+
+def read_stringer_stresses(name_dir, cache=True, stress_dtype=np.float64):
+    return cached_read(os.path.join(name_dir, 'stringer_v2.csv'), f'stringer_stresses_{np.dtype(stress_dtype).name}',
+                       lambda path: _stringer_stresses(path, stress_dtype), cache)
+
+def read_panel_properties(name_dir, cache=True):
+    return cached_read(os.path.join(name_dir, 'panel_properties.xlsx'), 'panel_properties', _panel_properties, cache)
+
+def read_stringer_properties(name_dir, cache=True):
+    return cached_read(os.path.join(name_dir, 'stringer_properties.csv'), 'stringer_properties', _stringer_properties, cache)
+
+def read_component_matching(data_dir, cache=True):
+    return cached_read(os.path.join(data_dir, 'element_component_matching.csv'), 'component_matching', _component_matching, cache)
+
+def read_stringer_matching(data_dir, cache=True):
+    return cached_read(os.path.join(data_dir, 'stringer_element_matching.csv'), 'stringer_matching', _stringer_matching, cache)
+
+def read_topology(data_dir, cache=True, config_path=topology.CONFIG_PATH):
+    """
+    Element topology of the model.
+
+    The element_component_matching.csv in data_dir is the source of the components, checked against
+    stringer_element_matching.csv if it exists. The rods are not in the matching files, they are taken from
+    rod_elements of the [topology] section of config.ini. If that section exists, its layout must agree with the
+    matching files, else a ValueError is raised. Without element_component_matching.csv the layout of config.ini is
+    used alone.
+    """
+    layout = topology.read_layout(config_path)
+    if not os.path.isfile(os.path.join(data_dir, 'element_component_matching.csv')):
+        return topology.default_topology(config_path)
+    stringerMatching = read_stringer_matching(data_dir, cache) if os.path.isfile(os.path.join(data_dir, 'stringer_element_matching.csv')) else None
+    fileTopology = Topology.from_frames(read_component_matching(data_dir, cache), stringerMatching,
+                                        rod_elements=layout['rod_elements'] if layout is not None else ())
+    if layout is not None:
+        mismatched = fileTopology.mismatched_elements(topology.default_topology(config_path))
+        if len(mismatched):
+            raise ValueError(f'The [topology] layout in {config_path} does not agree with the element matching files in {data_dir} '
+                             f'for elements {mismatched[:10].tolist()}{" ..." if len(mismatched) > 10 else ""}')
+    return fileTopology
+
+def read_element_masses(name_dir, cache=True):
+    return cached_read(os.path.join(name_dir, 'element_masses.csv'), 'element_masses', _element_masses, cache)
+
+def read_strs_stresses(path, cache=True, elementTopology=None, stress_dtype=np.float64):
+    """
+    Panel and stringer stresses of a .strs file, in the layout of read_panel_stresses and read_stringer_stresses.
+
+    Panel stresses are the mean of the two PLATE fibres (the 'Mid' layer of panel_v2.csv), stringer stresses are the
+    AXIAL column of the BAR block. The parsed blocks are cached by strsfile.read_arrays.
+
+    Returns:
+        paneldf, stringerdf
+    """
+    return strs_stresses(strsfile.read_arrays(path, cache=cache), elementTopology, stress_dtype)
+
+def strs_stresses(arrays, elementTopology=None, stress_dtype=np.float64):
+    # Stress tables of the panel elements in the PLATE and the stringer elements in the BAR arrays of
+    # strsfile.block_arrays (default topology: config.ini)
+    if elementTopology is None:
+        elementTopology = topology.default_topology()
+    plate = arrays['PLATE'][elementTopology.element_kind(arrays['PLATE']['element']) == topology.KIND_PANEL]
+    paneldf = apply_schema(pd.DataFrame({
+        'Elements': plate['element'],
+        'Loadcase': plate['subcase'],
+        'XX': (plate['XX1'] + plate['XX2']) / 2,
+        'XY': (plate['XY1'] + plate['XY2']) / 2,
+        'YY': (plate['YY1'] + plate['YY2']) / 2,
+    }), PANEL_STRESS_SCHEMA, stress_dtype)
+    bar = arrays['BAR'][elementTopology.element_kind(arrays['BAR']['element']) == topology.KIND_STRINGER]
+    stringerdf = apply_schema(pd.DataFrame({
+        'Elements': bar['element'],
+        'Loadcase': bar['subcase'],
+        'Element Stresses (1D):CBAR/CBEAM Axial Stress': bar['AXIAL'],
+    }), STRINGER_STRESS_SCHEMA, stress_dtype)
+    return paneldf, stringerdf
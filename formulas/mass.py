@@ -0,0 +1,93 @@
+"""
+Structural mass from the geometry, without the element_masses.csv export of HyperMesh.
+
+Panels are thickness x element length x stringer pitch plates, stringers hat sections (area as in
+columnbuckling.stringer_element_volume) of one element length. Rods are not part of the structure. All functions
+broadcast, so whole batches of candidate designs are evaluated at once.
+"""
+import numpy as np
+
+import columnbuckling as colbuckl
+import topology
+
+DENSITY = 2.7e-9        #t/mm^3, aluminium (masses are in tonnes like in element_masses.csv)
+ELEMENT_LENGTH = 750/3
+ELEMENT_WIDTH = 200     #stringer pitch
+
+
+def panel_element_mass_batch(thickness, elementLength=ELEMENT_LENGTH, elementWidth=ELEMENT_WIDTH, density=DENSITY):
+    # Full plate element (panel_element_volume is half of it, the share of one stiffener)
+    return np.asarray(thickness, dtype=float) * elementLength * elementWidth * density
+
+def stringer_element_mass_batch(DIM1, DIM2, DIM3, DIM4, elementLength=ELEMENT_LENGTH, density=DENSITY):
+    dims = {'dim1': DIM1, 'dim2': DIM2, 'dim3': DIM3, 'dim4': DIM4}
+    return colbuckl.stringer_element_volume({key: np.asarray(value, dtype=float) for key, value in dims.items()}, elementLength) * density
+
+def design_mass_batch(panel_thickness, stringer_dims, elements_per_panel=3, elements_per_stringer=3,
+                      elementLength=ELEMENT_LENGTH, elementWidth=ELEMENT_WIDTH, density=DENSITY):
+    """
+    Total mass of a batch of designs.
+
+    Args:
+        panel_thickness: (designs x panels) thickness of every panel
+        stringer_dims: (designs x stringers x 4) DIM1-DIM4 of every stringer
+        elements_per_panel, elements_per_stringer: Elements per component along the length
+
+    Returns:
+        Mass of every design in tonnes
+    """
+    panel_thickness = np.asarray(panel_thickness, dtype=float)
+    stringer_dims = np.asarray(stringer_dims, dtype=float)
+    panelMass = panel_element_mass_batch(panel_thickness, elementLength, elementWidth, density) * elements_per_panel
+    stringerMass = stringer_element_mass_batch(*np.moveaxis(stringer_dims, -1, 0), elementLength, density) * elements_per_stringer
+    return panelMass.sum(axis=-1) + stringerMass.sum(axis=-1)
+
+def element_masses(elementTopology, element_ids, element_thickness, component_dims,
+                   elementLength=ELEMENT_LENGTH, elementWidth=ELEMENT_WIDTH, density=DENSITY):
+    """
+    Mass of every element of one design, e.g. to compare with element_masses.csv.
+
+    Args:
+        elementTopology: topology.Topology of the model
+        element_ids: Elements to compute
+        element_thickness: Thickness per element (used for panel elements)
+        component_dims: (components x 4) DIM1-DIM4 per component code (used for stringer elements), e.g. from
+            Topology.component_values
+
+    Returns:
+        Mass per element in tonnes, 0 for rods and elements that are neither panel nor stringer
+    """
+    codes = elementTopology.component_codes(element_ids)
+    kind = elementTopology.element_kind(element_ids)
+    panelMass = panel_element_mass_batch(element_thickness, elementLength, elementWidth, density)
+    # Unknown elements (code -1) get NaN dimensions, not the last row of component_dims
+    component_dims = np.asarray(component_dims, dtype=float)
+    dims = np.full((len(codes), component_dims.shape[1]), np.nan)
+    dims[codes >= 0] = component_dims[codes[codes >= 0]]
+    stringerMass = stringer_element_mass_batch(*dims.T, elementLength, density)
+    mass = np.zeros(len(codes))
+    mass[kind == topology.KIND_PANEL] = panelMass[kind == topology.KIND_PANEL]
+    mass[kind == topology.KIND_STRINGER] = stringerMass[kind == topology.KIND_STRINGER]
+    return mass
+
+#Test case: the masses from the geometry against element_masses.csv of HyperMesh
+if __name__ == '__main__':
+    import os
+    import loaders
+
+    dataDir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    elementTopology = loaders.read_topology(dataDir)
+    for name in ['daniel', 'fabian', 'felix', 'yannis']:
+        nameDir = os.path.join(dataDir, name)
+        masses = loaders.read_element_masses(nameDir)
+        thickness = loaders.read_panel_properties(nameDir).set_index('Element ID')['thickness']
+        stringerProperties = loaders.read_stringer_properties(nameDir)
+        componentDims = elementTopology.component_values(stringerProperties['Component Name'], stringerProperties[['dim1', 'dim2', 'dim3', 'dim4']])
+        elementIds = masses['elements'].to_numpy()
+        computed = element_masses(elementTopology, elementIds, masses['elements'].map(thickness).to_numpy(float), componentDims)
+        # Only panels and stringers, the rods and elements without component (element 70) are not part of the structure
+        kind = elementTopology.element_kind(elementIds)
+        structure = (kind == topology.KIND_PANEL) | (kind == topology.KIND_STRINGER)
+        expected = masses['mass'].to_numpy(float)[structure]
+        print(f"{name}: {np.count_nonzero(structure)} elements, total {computed[structure].sum() * 1000:.4f} kg, expected {expected.sum() * 1000:.4f} kg")
+        assert np.allclose(computed[structure], expected, rtol=1e-6), name
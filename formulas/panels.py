@@ -1,10 +1,108 @@
 import math
 import numpy as np 
+from functools import lru_cache
 
 #Define variables to check range of half waves 
 N = 10
 M = 20
 
+#Buckling coefficients, they only depend on the aspect ratio (and stress ratio) and not on material or thickness.
+#The mode searches are memoized, so repeated panel geometries do not redo the half wave loops.
+COEFF_CACHE_SIZE = 4096
+
+#Optional precomputed mode table for biaxialSS_coeff, see buildBiaxialTable
+BIAXIAL_TABLE = None
+
+
+def biaxialSS_coeff(alpha, beta):
+    if BIAXIAL_TABLE is not None:
+        mode = _biaxialTableMode(BIAXIAL_TABLE, alpha, beta)
+        if mode is not None:
+            n, m = mode
+            k_sigma = pow((m**2 + n**2 * alpha**2), 2)/ (alpha**2 * (m**2 + beta * n**2 * alpha**2))
+            if k_sigma > 0:
+                return n, m, k_sigma
+    return _biaxialSS_coeff(alpha, beta, N, M)
+
+@lru_cache(maxsize=COEFF_CACHE_SIZE)
+def _biaxialSS_coeff(alpha, beta, halfWavesN, halfWavesM):
+    k_sigma_it = dict()  #Create dictionary to store the buckling factors for different n,m
+    #Looping over n half waves in width direction and over m half waves in length direction 
+    for n in range(1,halfWavesN):        
+        for m in range(1,halfWavesM):
+            k_sigma = pow((m**2 + n**2 * alpha**2), 2)/ (alpha**2 * (m**2 + beta * n**2 * alpha**2))  #buckling factor 
+            if k_sigma > 0:
+                k_sigma_it.update({(n,m):k_sigma})                                    #buckling factor dictionary in dependence of m and n 
+    finalN, finalM = min(k_sigma_it, key = k_sigma_it.get)    #Select the smallest buckling factor and recover n and m 
+    return finalN, finalM, k_sigma_it[(finalN,finalM)]
+
+def uniaxialSS_coeff(alpha):
+    return _uniaxialSS_coeff(alpha, M)
+
+@lru_cache(maxsize=COEFF_CACHE_SIZE)
+def _uniaxialSS_coeff(alpha, halfWavesM):
+    k_sigma_it = dict()
+    #Loop over the number of half waves in length direction
+    for m in range(1,halfWavesM):
+        k_sigma_it.update({m:pow((m/alpha + alpha/m),2)})
+    finalM = min(k_sigma_it, key = k_sigma_it.get)    #Recover the number of half waves, where the minimum buckling factor occurs 
+    return finalM, k_sigma_it[finalM]
+
+@lru_cache(maxsize=COEFF_CACHE_SIZE)
+def shearSS_coeff(alpha):
+    if alpha < 1:
+        k_tau = 4 + (5.34/pow(alpha,2))
+    elif alpha >= 1:
+        k_tau = 5.34 + (4/pow(alpha,2))
+    return k_tau
+
+def clearCoeffCache():
+    _biaxialSS_coeff.cache_clear()
+    _uniaxialSS_coeff.cache_clear()
+    shearSS_coeff.cache_clear()
+
+def buildBiaxialTable(alphas, betas):
+    """
+    Precompute the governing (n, m) mode of biaxialSS_coeff on an alpha/beta grid.
+
+    Args:
+        alphas: increasing grid of aspect ratios (after the flip, so length/width of the loaded panel)
+        betas: increasing grid of stress ratios sigma_y/sigma_x
+
+    Returns:
+        Table to hand to setBiaxialTable
+    """
+    alphas = np.asarray(alphas, dtype=float)
+    betas = np.asarray(betas, dtype=float)
+    finalN, finalM, k_sigma_min = biaxialSS_coeff_batch(alphas[:, np.newaxis], betas[np.newaxis, :])
+    return {'alpha': alphas, 'beta': betas, 'n': finalN, 'm': finalM, 'N': N, 'M': M}
+
+def setBiaxialTable(table):
+    """
+    Use a table from buildBiaxialTable for the mode search, None switches back to the exact search only.
+
+    Inside the table the mode is taken from the grid and only k_sigma is evaluated for it. If the four grid
+    points around (alpha, beta) disagree on the mode (a mode switch), or (alpha, beta) is outside the grid,
+    the exact (cached) search is used instead.
+    """
+    global BIAXIAL_TABLE
+    BIAXIAL_TABLE = table
+
+def _biaxialTableMode(table, alpha, beta):
+    if table['N'] != N or table['M'] != M:
+        return None
+    i = np.searchsorted(table['alpha'], alpha, side='right') - 1
+    j = np.searchsorted(table['beta'], beta, side='right') - 1
+    if not (0 <= i < len(table['alpha'])-1 and 0 <= j < len(table['beta'])-1):
+        return None
+    cornersN = table['n'][i:i+2, j:j+2]
+    cornersM = table['m'][i:i+2, j:j+2]
+    n = cornersN[0, 0]
+    m = cornersM[0, 0]
+    if n == 0 or (cornersN != n).any() or (cornersM != m).any():
+        return None
+    return int(n), int(m)
+
 
 def uniaxialF_calc(EModulus, nu, length, width, thickness, sigma_x):
     print("Uniaxial free edge")
@@ -14,17 +112,10 @@ def uniaxialF_calc(EModulus, nu, length, width, thickness, sigma_x):
 
 def uniaxialSS_calc(EModulus, nu, length, width, thickness, sigma_x):
     print("Uniaxial simply supported")
-    global N 
-    global M
-    sigma_crit_it = dict()
     alpha = length/width
-    #Loop over the number of half waves in length direction
-    for m in range(1,M):
-        k_sigma = pow((m/alpha + alpha/m),2)
-        sigma_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * pow(thickness/width,2)
-        sigma_crit_it.update({m:k_sigma * sigma_e}) 	    #Collect critcical values in a dictionary 
-    finalM = min(sigma_crit_it, key = sigma_crit_it.get)    #Recover the number of half waves, where the minimum critical stress occurs 
-    sigma_crit = sigma_crit_it[finalM]                      #Also recover the corresponding critical stress 
+    finalM, k_sigma = uniaxialSS_coeff(alpha)                #Number of half waves and buckling factor only depend on alpha
+    sigma_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * pow(thickness/width,2)
+    sigma_crit = k_sigma * sigma_e                          #Recover the corresponding critical stress 
     reserveFactor = sigma_crit/ (sigma_x*1.5)                    #Calculate the reserve factor with it, 1.5 to get ultimate loads for the reserve factor 
     return finalM, sigma_crit, abs(reserveFactor)
 
@@ -42,28 +133,17 @@ def biaxialSS_calc(EModulus, nu, length, width, thickness, sigma_x, sigma_y):
         length = width
         width = length_temp
 
-    k_sigma_it = dict()  #Create dictionary to store the critcial stresses for different n,m
     alpha = length/width
     beta = sigma_y/sigma_x
     sigma_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * pow(thickness/width,2)         #refernence stress
-    #Looping over n half waves in width direction and over m half waves in length direction 
-    for n in range(1,N):        
-        for m in range(1,M):
-            k_sigma = pow((m**2 + n**2 * alpha**2), 2)/ (alpha**2 * (m**2 + beta * n**2 * alpha**2))  #buckling factor 
-            if k_sigma > 0:
-                k_sigma_it.update({(n,m):k_sigma})                                    #critical stress dictionary in dependence of m and n 
-    finalN, finalM = min(k_sigma_it, key = k_sigma_it.get)    #Select the smallest critcial stress and recover n and m 
-    k_sigma_min = k_sigma_it[(finalN,finalM)] 
+    finalN, finalM, k_sigma_min = biaxialSS_coeff(alpha, beta)     #Mode and buckling factor only depend on alpha and beta
     sigma_crit = k_sigma_min *  sigma_e                   #And then also recover the corresponding critical stress 
     reserveFactor = sigma_crit / (sigma_x*1.5)                          #Calculate the reserve factor based on this the critical stress, 1.5 to get ultimate loads for the reserve factor
     return finalN, finalM,k_sigma_min, sigma_crit, abs(reserveFactor)
 
 def shearSS_calc(EModulus, nu, length, width, thickness, tau_xy):
     alpha = length/width
-    if alpha < 1:
-        k_tau = 4 + (5.34/pow(alpha,2))
-    elif alpha >= 1:
-        k_tau = 5.34 + (4/pow(alpha,2))
+    k_tau = shearSS_coeff(alpha)
     tau_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * pow(thickness/width,2)
     tau_crit = tau_e * k_tau
     reserveFactor = tau_crit / (tau_xy*1.5) # 1.5 to get ultimate loads for the reserve factor
@@ -85,6 +165,90 @@ def panelBuckApply(row, EModulus, nu):
     return k_shear, k_biaxial, reserveFactor 
 
 
+#Batch versions of the buckling formulas, working on NumPy arrays of panels instead of single values
+def biaxialSS_batch(EModulus, nu, length, width, thickness, sigma_x, sigma_y):
+    """
+    Vectorised biaxialSS_calc for many panels at once.
+
+    length, width, thickness, sigma_x and sigma_y can be scalars or arrays (broadcast against each other).
+    The whole (n, m) half wave grid is evaluated for all panels together instead of looping per panel,
+    the results match biaxialSS_calc up to floating point rounding.
+
+    Returns:
+        finalN, finalM, k_sigma_min, sigma_crit, reserveFactor as arrays in the shape of the inputs.
+        Panels without any positive buckling factor get finalN = finalM = 0 and NaN values.
+    """
+    length, width, thickness, sigma_x, sigma_y = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (length, width, thickness, sigma_x, sigma_y)))
+    #Flip the panels where needed, same as in biaxialSS_calc
+    flip = sigma_y < sigma_x
+    sigma_x, sigma_y = np.where(flip, sigma_y, sigma_x), np.where(flip, sigma_x, sigma_y)
+    length, width = np.where(flip, width, length), np.where(flip, length, width)
+
+    alpha = length/width
+    beta = sigma_y/sigma_x
+    sigma_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * (thickness/width)**2     #reference stress
+    finalN, finalM, k_sigma_min = biaxialSS_coeff_batch(alpha, beta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_crit = k_sigma_min * sigma_e
+        reserveFactor = sigma_crit / (sigma_x*1.5)          #1.5 to get ultimate loads for the reserve factor
+    return finalN, finalM, k_sigma_min, sigma_crit, np.abs(reserveFactor)
+
+def biaxialSS_coeff_batch(alpha, beta):
+    """
+    Vectorised biaxialSS_coeff, returns finalN, finalM and k_sigma_min arrays for arrays of alpha and beta.
+    Entries without any positive buckling factor get finalN = finalM = 0 and k_sigma_min = NaN.
+    """
+    alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float))
+    alpha = alpha[..., np.newaxis, np.newaxis]
+    beta = beta[..., np.newaxis, np.newaxis]
+    #Half waves in width direction along axis -2, in length direction along axis -1
+    n = np.arange(1, N, dtype=float)[:, np.newaxis]
+    m = np.arange(1, M, dtype=float)[np.newaxis, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k_sigma = (m**2 + n**2 * alpha**2)**2 / (alpha**2 * (m**2 + beta * n**2 * alpha**2))   #buckling factor grid
+        k_sigma = np.where(k_sigma > 0, k_sigma, np.inf)                                        #only positive factors count
+    #Flattened n-major like the dictionary in biaxialSS_calc, so ties resolve to the same mode
+    k_sigma = k_sigma.reshape(k_sigma.shape[:-2] + (-1,))
+    index = np.argmin(k_sigma, axis=-1)
+    k_sigma_min = np.take_along_axis(k_sigma, index[..., np.newaxis], axis=-1)[..., 0]
+    found = np.isfinite(k_sigma_min)
+    finalN = np.where(found, index // (M-1) + 1, 0)
+    finalM = np.where(found, index % (M-1) + 1, 0)
+    k_sigma_min = np.where(found, k_sigma_min, np.nan)
+    return finalN, finalM, k_sigma_min
+
+def shearSS_batch(EModulus, nu, length, width, thickness, tau_xy):
+    """
+    Vectorised shearSS_calc, inputs can be scalars or arrays.
+    """
+    length, width, thickness, tau_xy = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (length, width, thickness, tau_xy)))
+    alpha = length/width
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k_tau = np.where(alpha < 1, 4 + (5.34/alpha**2), 5.34 + (4/alpha**2))
+        tau_e = (EModulus*pow(math.pi,2))/(12*(1-pow(nu,2))) * (thickness/width)**2
+        tau_crit = tau_e * k_tau
+        reserveFactor = tau_crit / (tau_xy*1.5)
+    return k_tau, tau_crit, np.abs(reserveFactor)
+
+def combinedBiaxialShear_batch(EModulus, nu, length, width, thickness, sigma_x, sigma_y, tau_xy):
+    """
+    Vectorised combinedBiaxialShear, inputs can be scalars or arrays.
+    """
+    finalN, finalM, k_biaxial, sigma_crit, reserveFactorBi = biaxialSS_batch(EModulus=EModulus, nu=nu, length=length, width=width, thickness=thickness, sigma_x=sigma_x, sigma_y=sigma_y)
+    k_shear, tau_crit, reserveFactorShear = shearSS_batch(EModulus=EModulus, nu=nu, length=length, width=width, thickness=thickness, tau_xy=tau_xy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        combinedReserveFactor = 1/(1/reserveFactorBi + (1/reserveFactorShear)**2)
+    return k_shear, k_biaxial, np.abs(combinedReserveFactor)
+
+# Batch replacement for df.apply(panelBuckApply, axis=1, result_type='expand')
+def panelBuckBatch(df, EModulus, nu):
+    k_shear, k_biaxial, reserveFactor = combinedBiaxialShear_batch(EModulus=EModulus, nu=nu, length=df['length'].to_numpy(), width=df['width'].to_numpy(), thickness=df['thickness'].to_numpy(),
+                                                                  sigma_x=df['sigmaXX'].to_numpy(), sigma_y=df['sigmaYY'].to_numpy(), tau_xy=df['sigmaXY'].to_numpy())
+    return k_shear, k_biaxial, reserveFactor
+
+
 #Running test on all functions 
 if __name__ == '__main__':
     # Define test data
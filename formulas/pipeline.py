@@ -0,0 +1,319 @@
+"""
+Headless version of the task 1d/1e/1f and mass calculator notebooks.
+
+Runs the strength (d), panel buckling (e), column buckling (f) and mass checks for one or more data/{name}
+directories and writes the same output files as the notebooks (data/{name}/output/processed_*.xlsx and total_mass.txt).
+
+The stresses can also be read directly from an OptiStruct .strs result file (--strs), they then stay float64 up to
+the written output. Outputs are written as .xlsx (default) or .csv, compute_check returns them without writing.
+
+Usage (from the repository root):
+    python formulas/pipeline.py yannis fabian
+    python formulas/pipeline.py --all --checks d e --jobs 4
+    python formulas/pipeline.py yannis --strs ASE_Project2025_SuperPanel_FR.strs --format csv
+    python formulas/pipeline.py yannis --strs ASE_Project2025_SuperPanel_FR.strs --watch --rf-limit 1
+"""
+import os
+import argparse
+import sys
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import columnbuckling as colbuckl
+import helpers as hp
+import loaders
+import panels
+import strength
+import strsfile
+import topology
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+CONFIG_PATH = os.path.join(REPO_DIR, 'config.ini')
+
+CHECKS = ('d', 'e', 'f', 'mass')
+STRESS_CHECKS = ('d', 'e', 'f')
+FORMATS = ('xlsx', 'csv')
+OUTPUT_NAMES = {'d': 'processed_d', 'e': 'processed_e', 'f': 'processed_f', 'mass': 'total_mass'}
+
+#Constants from the notebooks
+SIGMA_ULT = 530
+PANEL_LENGTH = 750
+PANEL_WIDTH = 200
+STRINGER_PITCH = 200
+ELEMENT_LENGTH = 750/3
+
+
+def read_rounding_digits(config_path=CONFIG_PATH):
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    return int(config['DEFAULT']['rounding_digits'])
+
+def available_names(data_dir=DATA_DIR):
+    # Every data/{name} directory with a panel stress export
+    return sorted(name for name in os.listdir(data_dir) if os.path.isfile(os.path.join(data_dir, name, 'panel_v2.csv')))
+
+
+def read_stresses(name_dir, stresses=None, cache=True):
+    # Panel and stringer stresses from the exported csv files, unless they are given (e.g. from a .strs file)
+    if stresses is None:
+        return loaders.read_panel_stresses(name_dir, cache), loaders.read_stringer_stresses(name_dir, cache)
+    return stresses
+
+
+#Checks, each one returns what the corresponding notebook exports
+def strength_check(name_dir, rounding_digits, cache=True, stresses=None):
+    """
+    Task 1d: strength reserve factor of every panel and stringer element, one column per load case.
+    """
+    outputs = []
+    paneldf, stringerdf = read_stresses(name_dir, stresses, cache)
+    for stressdf, columns, check in [(paneldf, ['sigmaXX', 'sigmaYY', 'sigmaXY'], strength.panelStrength_batch),
+                                     (stringerdf, ['sigmaXX'], strength.stringerStrength_batch)]:
+        elements, loadcases, stacked = hp.stack_loadcases(stressdf, columns, loadcase_column='Loadcase')
+        reserveFactor = check(*(stacked[column] for column in columns), SIGMA_ULT)[0]
+        outputs.append(pd.DataFrame(reserveFactor, index=pd.Index(elements, name='Element ID'),
+                                    columns=[f'Load Case {loadcase} RF' for loadcase in loadcases]))
+    outputdf = pd.concat(outputs, axis=0)
+    return outputdf.round(rounding_digits)
+
+def panel_buckling_check(name_dir, EModulus, nu, rounding_digits, data_dir=DATA_DIR, cache=True, stresses=None):
+    """
+    Task 1e: biaxial + shear buckling reserve factor of every panel, one block of columns per load case.
+    """
+    topology = loaders.read_topology(data_dir, cache)
+    paneldf = read_stresses(name_dir, stresses, cache)[0].copy()
+    paneldf['Component Name'] = topology.component_categorical(paneldf['Element ID'])
+    paneldf = pd.merge(paneldf, loaders.read_panel_properties(name_dir, cache), on='Element ID')
+    # One row per (load case, panel) for all load cases at once
+    panelLC = paneldf.groupby(['Loadcase', 'Component Name'], observed=True).agg({
+        'sigmaXX': 'mean',
+        'sigmaYY': 'mean',
+        'sigmaXY': 'mean',
+        'thickness': 'median'
+    })
+    panelLC['length'] = PANEL_LENGTH
+    panelLC['width'] = PANEL_WIDTH
+    panelLC['k_shear'], panelLC['k_biaxial'], panelLC['Reserve Factor'] = panels.panelBuckBatch(panelLC, EModulus=EModulus, nu=nu)
+    outputdf = hp.widen_loadcases(panelLC, {
+        'sigmaXX': 'sigmaXXLC{loadcase}',
+        'sigmaYY': 'sigmaYYLC{loadcase}',
+        'sigmaXY': 'sigmaXYLC{loadcase}',
+        'k_shear': 'k_shearLC{loadcase}',
+        'k_biaxial': 'k_biaxialLC{loadcase}',
+        'Reserve Factor': 'LC {loadcase} RF',
+    })
+    return outputdf.round(rounding_digits)
+
+def column_buckling_check(name_dir, EModulus, sigma_yield, rounding_digits, data_dir=DATA_DIR, cache=True, stresses=None):
+    """
+    Task 1f: Euler-Johnson column buckling of every stiffener (stringer plus its two neighbouring panels).
+    """
+    topology = loaders.read_topology(data_dir, cache)
+    paneldf, stringerdf = read_stresses(name_dir, stresses, cache)
+    paneldf = pd.merge(paneldf, loaders.read_panel_properties(name_dir, cache), on='Element ID', how='left')
+    paneldf = paneldf.drop(columns=['sigmaYY', 'sigmaXY'])
+    paneldf['Volume'] = paneldf['thickness'] * ELEMENT_LENGTH * STRINGER_PITCH / 2     #see panel_element_volume
+    # Stringer dimensions per component code, looked up by the component code of every element
+    stringerProperties = loaders.read_stringer_properties(name_dir, cache)
+    dimensions = ['dim1', 'dim2', 'dim3', 'dim4']
+    componentDims = topology.component_values(stringerProperties['Component Name'], stringerProperties[dimensions])   #last row for unknown components
+    stringerdf = stringerdf.copy()
+    stringerdf[dimensions] = componentDims[topology.component_codes(stringerdf['Element ID'])]
+    stringerdf['Volume'] = colbuckl.stringer_element_volume(stringerdf, elementLength=ELEMENT_LENGTH)
+
+    # Attach every element to its stiffener(s), panels between two stringers count for both
+    combined = pd.concat([paneldf, stringerdf], ignore_index=True)
+    rows, stiffeners = topology.element_stiffeners(combined['Element ID'])
+    combined = combined.iloc[rows].reset_index(drop=True)
+    combined['Stiffener'] = topology.stiffener_categorical(stiffeners)
+    combined = combined.fillna(0)
+    combined['XX * Volume'] = combined['sigmaXX'] * combined['Volume']
+
+    # One row per (load case, stiffener)
+    combined = combined.groupby(['Loadcase', 'Stiffener'], observed=True).agg({
+        'XX * Volume': 'sum',
+        'Volume': 'sum',
+        'thickness': 'max',
+        'dim1': 'max',
+        'dim2': 'max',
+        'dim3': 'max',
+        'dim4': 'max',
+    })
+    combined['sigma_XX_avg'] = combined['XX * Volume'] / combined['Volume']
+    sections = hp.crosssectional_properties_hat_skin_frame(combined, stringer_pitch=STRINGER_PITCH, stringer_depth=ELEMENT_LENGTH*3)
+    combined['I_yy'] = sections['I_yy']
+    combined['areaTot'] = sections['areaTot']
+    for column, values in colbuckl.columnBuckBatch(combined, EModulus=EModulus, sigma_yield=sigma_yield, length=ELEMENT_LENGTH*3).items():
+        combined[column] = values
+
+    outputdf = hp.widen_loadcases(combined, {
+        'sigma_XX_avg': 'XX_avg_LC{loadcase}',
+        'sigma_crip': 'sigma_crip_LC{loadcase}',
+        'sigma_crit': 'sigma_crit_LC{loadcase}',
+        'Reserve Factor': 'RF_LC{loadcase}',
+    })
+    # Cross-section properties do not depend on the load case, take them from the first one
+    firstLoadcase = combined.xs(combined.index.get_level_values('Loadcase').min(), level='Loadcase')
+    outputdf['I_y'] = firstLoadcase['I_yy']
+    outputdf['Lambda'] = firstLoadcase['lambda']
+    outputdf['Lambda_crit'] = firstLoadcase['lambda_crit']
+    outputdf['R_gyr'] = firstLoadcase['r_gyr']
+    return outputdf.round(rounding_digits)
+
+def mass_check(name_dir, rounding_digits, cache=True, data_dir=DATA_DIR):
+    """
+    Total structural mass in kg, the rods (component 'rod' of the topology) are not part of the structure.
+    """
+    elementdf = loaders.read_element_masses(name_dir, cache)
+    elementdf = elementdf[loaders.read_topology(data_dir, cache).element_kind(elementdf['elements']) != topology.KIND_ROD]
+    return round(elementdf['mass'].sum() * 1000, rounding_digits)
+
+
+def compute_check(name, check, data_dir=DATA_DIR, rounding_digits=None, cache=True, strs_path=None, stresses=None, stress_dtype=np.float64):
+    """
+    Run a single check for data/{name} without writing anything.
+
+    The stresses come from stresses (paneldf, stringerdf) if given, else from strs_path, else from the csv exports,
+    read as stress_dtype (np.float32 halves their memory).
+
+    Returns:
+        DataFrame of the check, total mass in kg for the mass check
+    """
+    if rounding_digits is None:
+        rounding_digits = read_rounding_digits()
+    name_dir = os.path.join(data_dir, name)
+    sigma_yield, EModulus, nu = hp.personal_data_provider(name)
+    if stresses is None and strs_path is not None and check != 'mass':
+        stresses = loaders.read_strs_stresses(strs_path, cache, stress_dtype=stress_dtype)
+    elif stresses is None and check != 'mass':
+        stresses = loaders.read_panel_stresses(name_dir, cache, stress_dtype), loaders.read_stringer_stresses(name_dir, cache, stress_dtype)
+
+    if check == 'd':
+        return strength_check(name_dir, rounding_digits, cache, stresses)
+    if check == 'e':
+        return panel_buckling_check(name_dir, EModulus, nu, rounding_digits, data_dir, cache, stresses)
+    if check == 'f':
+        return column_buckling_check(name_dir, EModulus, sigma_yield, rounding_digits, data_dir, cache, stresses)
+    if check == 'mass':
+        return mass_check(name_dir, rounding_digits, cache, data_dir)
+    raise ValueError(f"Unknown check '{check}', choose from {CHECKS}")
+
+def run_check(name, check, data_dir=DATA_DIR, rounding_digits=None, cache=True, strs_path=None, output_format='xlsx', stress_dtype=np.float64):
+    """
+    Run a single check for data/{name} and write its output file.
+
+    Returns:
+        Path of the written file
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', choose from {FORMATS}")
+    result = compute_check(name, check, data_dir, rounding_digits, cache, strs_path, stress_dtype=stress_dtype)
+    output_dir = os.path.join(data_dir, name, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    if check == 'mass':
+        path = os.path.join(output_dir, OUTPUT_NAMES[check] + '.txt')
+        with open(path, 'w') as f:
+            f.write(str(result) + ' kg')
+    elif output_format == 'csv':
+        path = os.path.join(output_dir, OUTPUT_NAMES[check] + '.csv')
+        result.to_csv(path)
+    else:
+        path = os.path.join(output_dir, OUTPUT_NAMES[check] + '.xlsx')
+        result.to_excel(path)
+    return path
+
+def run(names, checks=CHECKS, jobs=None, data_dir=DATA_DIR, cache=True, strs_path=None, output_format='xlsx', stress_dtype=np.float64):
+    """
+    Run the checks for all names, every (name, check) pair as its own task in a process pool.
+
+    Returns:
+        Dictionary (name, check) -> written file
+    """
+    rounding_digits = read_rounding_digits()
+    tasks = [(name, check) for name in names for check in checks]
+    if jobs == 1:
+        return {task: run_check(*task, data_dir=data_dir, rounding_digits=rounding_digits, cache=cache, strs_path=strs_path, output_format=output_format, stress_dtype=stress_dtype) for task in tasks}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {task: pool.submit(run_check, *task, data_dir=data_dir, rounding_digits=rounding_digits, cache=cache, strs_path=strs_path,
+                                         output_format=output_format, stress_dtype=stress_dtype) for task in tasks}
+        return {task: future.result() for task, future in futures.items()}
+
+
+def worst_reserve_factor(result):
+    # Smallest reserve factor over all RF columns of a check result
+    return result[[column for column in result.columns if 'RF' in column]].min().min()
+
+def watch(name, strs_path, checks=STRESS_CHECKS, data_dir=DATA_DIR, rounding_digits=None, rf_limit=None,
+          poll_interval=1.0, idle_timeout=60, cache=True):
+    """
+    Follow a .strs file while the solver writes it and run the stress checks for every completed subcase.
+
+    Args:
+        name: Name of the data directory with the properties of the design
+        strs_path: .strs file, may still be growing
+        checks: Stress checks to run per subcase
+        rf_limit: Stop after the first subcase with a reserve factor below this value or without any reserve
+            factor (default: never)
+        poll_interval, idle_timeout: See strsfile.follow_subcases
+
+    Yields:
+        subcase number, dictionary check -> result for this subcase, worst reserve factor of the subcase
+    """
+    if rounding_digits is None:
+        rounding_digits = read_rounding_digits()
+    for check in checks:
+        if check not in STRESS_CHECKS:
+            raise ValueError(f"Check '{check}' does not use the stresses, choose from {STRESS_CHECKS}")
+    for subcase, label, records in strsfile.follow_subcases(strs_path, blocks=('BAR', 'PLATE'), poll_interval=poll_interval, idle_timeout=idle_timeout):
+        stresses = loaders.strs_stresses(strsfile.block_arrays(records))
+        results = {check: compute_check(name, check, data_dir, rounding_digits, cache, stresses=stresses) for check in checks}
+        worsts = np.array([worst_reserve_factor(result) for result in results.values()], dtype=float)
+        # NaN if no check gave a reserve factor at all (e.g. missing properties), which counts as failing rf_limit
+        worst = np.nanmin(worsts) if not np.isnan(worsts).all() else np.nan
+        yield subcase, results, worst
+        if rf_limit is not None and not worst >= rf_limit:
+            return
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the reserve factor and mass checks for data/{name} directories.')
+    parser.add_argument('names', nargs='*', help='names of the data directories (daniel, fabian, felix, yannis)')
+    parser.add_argument('--all', action='store_true', help='run every directory in data/')
+    parser.add_argument('--checks', nargs='+', default=list(CHECKS), choices=CHECKS, help='checks to run (default: all)')
+    parser.add_argument('--jobs', type=int, default=None, help='number of worker processes (default: number of CPUs, 1 runs serially)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory containing the {name} folders')
+    parser.add_argument('--strs', default=None, help='read the stresses from this OptiStruct .strs file instead of panel_v2.csv/stringer_v2.csv (one name only)')
+    parser.add_argument('--watch', action='store_true', help='follow the --strs file while the solver writes it and report the reserve factors per finished subcase')
+    parser.add_argument('--rf-limit', type=float, default=None, help='with --watch: stop (exit code 3) at the first subcase with a reserve factor below this value')
+    parser.add_argument('--idle-timeout', type=float, default=60, help='with --watch: seconds without new data after which the .strs file counts as finished (default: 60)')
+    parser.add_argument('--format', default='xlsx', choices=FORMATS, help='file format of the processed_* outputs (default: xlsx)')
+    parser.add_argument('--float32', action='store_true', help='keep the stresses as float32 to halve their memory')
+    parser.add_argument('--no-cache', action='store_true', help='read the input files directly instead of through the .cache folders')
+    args = parser.parse_args(argv)
+
+    names = available_names(args.data_dir) if args.all else args.names
+    if not names:
+        parser.error('give at least one name or --all')
+    if args.strs is not None and len(names) > 1:
+        parser.error('--strs holds the results of one design, give a single name')
+    if args.watch:
+        if args.strs is None:
+            parser.error('--watch needs --strs')
+        checks = [check for check in args.checks if check in STRESS_CHECKS]
+        worst = None
+        for subcase, results, worst in watch(names[0], args.strs, checks, args.data_dir, rf_limit=args.rf_limit,
+                                             idle_timeout=args.idle_timeout, cache=not args.no_cache):
+            print(f'subcase {subcase}: ' + ', '.join(f'{check} RF {worst_reserve_factor(result)}' for check, result in results.items()), flush=True)
+        if args.rf_limit is not None and worst is not None and not worst >= args.rf_limit:
+            print(f'reserve factor {worst} below {args.rf_limit}, stopped', flush=True)
+            sys.exit(3)
+        return
+    for (name, check), path in run(names, args.checks, args.jobs, args.data_dir, cache=not args.no_cache, strs_path=args.strs, output_format=args.format,
+                                      stress_dtype=np.float32 if args.float32 else np.float64).items():
+        print(f'{name} {check}: {os.path.relpath(path)}')
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def panelStrength_calc(row, sigma_ult):
     sigma_avg = math.sqrt(row['sigmaXX']**2 + row['sigmaYY']**2 - row['sigmaXX'] * row['sigmaYY'] + 3*row['sigmaXY']**2)
@@ -7,4 +8,39 @@ def panelStrength_calc(row, sigma_ult):
 
 def stringerStrength_calc(row, sigma_ult):
     reserveFactor = abs(sigma_ult/(1.5*row['sigmaXX']))
-    return reserveFactor
\ No newline at end of file
+    return reserveFactor
+
+#Batch versions, working on stacked (element x load case) stress arrays, e.g. from helpers.stack_loadcases
+def panelStrength_batch(sigmaXX, sigmaYY, sigmaXY, sigma_ult):
+    """
+    Von Mises strength check of panels for all elements and load cases in one pass.
+
+    Returns:
+        reserveFactor matrix, worst case reserve factor per element and the load case column it occurs in
+    """
+    sigmaXX, sigmaYY, sigmaXY = (np.asarray(value, dtype=float) for value in (sigmaXX, sigmaYY, sigmaXY))
+    sigma_avg = np.sqrt(sigmaXX**2 + sigmaYY**2 - sigmaXX * sigmaYY + 3*sigmaXY**2)
+    with np.errstate(divide='ignore'):
+        reserveFactor = np.abs(sigma_ult/(1.5*sigma_avg))
+    return (reserveFactor,) + strengthEnvelope(reserveFactor)
+
+def stringerStrength_batch(sigmaXX, sigma_ult):
+    """
+    Axial strength check of stringers for all elements and load cases in one pass.
+
+    Returns:
+        reserveFactor matrix, worst case reserve factor per element and the load case column it occurs in
+    """
+    with np.errstate(divide='ignore'):
+        reserveFactor = np.abs(sigma_ult/(1.5*np.asarray(sigmaXX, dtype=float)))
+    return (reserveFactor,) + strengthEnvelope(reserveFactor)
+
+def strengthEnvelope(reserveFactor):
+    # Lowest reserve factor over the last axis (load cases), missing load cases (NaN) are ignored. Elements without
+    # stress (RF inf) keep inf, NaN only if all load cases are missing
+    reserveFactor = np.asarray(reserveFactor, dtype=float)
+    missing = np.isnan(reserveFactor)
+    reserveFactor = np.where(missing, np.inf, reserveFactor)
+    worstLoadCase = np.argmin(reserveFactor, axis=-1)
+    worstReserveFactor = np.take_along_axis(reserveFactor, worstLoadCase[..., np.newaxis], axis=-1)[..., 0]
+    return np.where(missing.all(axis=-1), np.nan, worstReserveFactor), worstLoadCase
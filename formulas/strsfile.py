@@ -0,0 +1,403 @@
+"""
+Reading OptiStruct .strs result files.
+
+The file is read line by line with a small state machine over the $SUBCASE and $ELEMENT STRESS(...) headers, so
+memory use does not grow with the file size.
+
+An index with the byte offsets of every subcase and stress block can be stored beside the file (build_index), so
+single subcases can be read without scanning the rest and subcases can be parsed in parallel (map_subcases).
+read_arrays gives every stress block with all of its columns as a structured NumPy array, cached beside the file.
+follow_subcases follows a file that is still being written by the solver and yields every subcase once it is complete.
+"""
+import os
+import re
+import json
+import mmap
+import time
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import topology
+
+#One table row of a stress block: subcase number and label, block type (ROD, BAR, PLATE, ...), column names of the
+#block (without the element column), element id and the row values
+StrsRecord = namedtuple('StrsRecord', ['subcase', 'label', 'block', 'columns', 'element', 'values'])
+
+SUBCASE_HEADER = re.compile(r'\$SUBCASE\s+(\d+)\s*(\S*)')
+BLOCK_HEADER = re.compile(r'\$ELEMENT STRESS\((\w+)\)')
+INDEX_HEADER = re.compile(rb'^\$(?:SUBCASE[ \t]+(\d+)[ \t]*(\S*)|ELEMENT STRESS\((\w+)\))', re.M)
+INDEX_VERSION = 1
+ARRAYS_VERSION = 1
+
+
+def scientific_format(value):
+    return f"{float(value):.2E}"
+
+def iter_records(lines, subcase=None, label=None, block=None):
+    """
+    Stream the stress rows of a .strs file.
+
+    Args:
+        lines: Iterable of lines, e.g. an open file
+        subcase, label, block: State to start in, when lines start inside a subcase or block
+
+    Yields:
+        StrsRecord per element row, in file order
+    """
+    columns = ()
+    for line in lines:
+        if line.startswith('$'):
+            match = SUBCASE_HEADER.match(line)
+            if match:
+                subcase, label = int(match.group(1)), match.group(2)
+                block = None
+                continue
+            match = BLOCK_HEADER.match(line)
+            block = match.group(1) if match and subcase is not None else None
+            columns = ()
+            continue
+        if block is None:
+            continue
+        parts = line.split()
+        if not parts or parts[0].startswith('-'):
+            continue
+        if not parts[0].isdigit():
+            # Column header, e.g. "PLATE #  VON  XX1 ..."
+            columns = tuple(part for part in parts[1:] if part != '#')
+            continue
+        try:
+            values = tuple(float(part) for part in parts[1:])
+        except ValueError:
+            continue
+        yield StrsRecord(subcase, label, block, columns, int(parts[0]), values)
+
+def _block_closed(line, state):
+    # Tracks the block the lines of a subcase are in, True when the line closes it (dashed line after its rows)
+    match = BLOCK_HEADER.match(line)
+    if match:
+        state['block'], state['rows'] = match.group(1), False
+        return False
+    if state['block'] is None:
+        return False
+    parts = line.split()
+    if parts and parts[0].isdigit():
+        state['rows'] = True
+    elif line.startswith('-') and state['rows']:
+        state['closed'].add(state['block'])
+        state['block'] = None
+        return True
+    return False
+
+def read_records(path):
+    with open(path, 'r') as file:
+        yield from iter_records(file)
+
+
+def follow_subcases(path, blocks=None, poll_interval=1.0, idle_timeout=None):
+    """
+    Follow a .strs file while the solver is writing it and yield every subcase as soon as it is complete.
+
+    A subcase is complete once all of the given blocks are closed, or else when the next $SUBCASE header starts. The
+    last subcase is only known to be complete from its blocks, or when the file did not grow for idle_timeout
+    seconds, which also ends the generator. Closing the generator (e.g. breaking out of the loop) stops following.
+
+    Args:
+        path: .strs file, waited for if it does not exist yet
+        blocks: Block types a subcase needs to be complete, e.g. ('BAR', 'PLATE')
+        poll_interval: Seconds between checks for new data
+        idle_timeout: Seconds without new data after which the file is taken as finished (default: wait forever)
+
+    Yields:
+        subcase number, label, list of StrsRecord
+    """
+    blocks = set(blocks or ())
+    lastGrowth = time.monotonic()
+    while not os.path.exists(path):
+        if idle_timeout is not None and time.monotonic() - lastGrowth > idle_timeout:
+            return
+        time.sleep(poll_interval)
+    lines = []
+    emitted = True
+    partial = ''
+    state = None
+    with open(path, 'r') as file:
+        while True:
+            chunk = file.read()
+            if not chunk:
+                if idle_timeout is not None and time.monotonic() - lastGrowth > idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+            lastGrowth = time.monotonic()
+            newLines = (partial + chunk).split('\n')
+            # The last piece may be a line that is only half written
+            partial = newLines.pop()
+            for line in newLines:
+                match = SUBCASE_HEADER.match(line)
+                if match:
+                    if not emitted:
+                        yield state['subcase'], state['label'], list(iter_records(lines))
+                    lines = [line]
+                    emitted = False
+                    state = {'subcase': int(match.group(1)), 'label': match.group(2), 'block': None, 'rows': False, 'closed': set()}
+                elif not emitted:
+                    lines.append(line)
+                    if _block_closed(line, state) and blocks and blocks <= state['closed']:
+                        emitted = True
+                        yield state['subcase'], state['label'], list(iter_records(lines))
+    if not emitted:
+        lines.append(partial)
+        yield state['subcase'], state['label'], list(iter_records(lines))
+
+
+#Byte offset index
+def index_path(path):
+    return path + '.index.json'
+
+def build_index(path):
+    """
+    Scan the file once (memory mapped) for the $SUBCASE and $ELEMENT STRESS(...) headers.
+
+    Returns:
+        Dictionary with the size and modification time of the file and per subcase its number, label, byte range
+        [start, end) and the byte ranges of its stress blocks
+    """
+    stat = os.stat(path)
+    subcases = []
+    with open(path, 'rb') as f:
+        if stat.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lastRange = None
+                for match in INDEX_HEADER.finditer(mm):
+                    # A header ends the block before it
+                    if lastRange is not None:
+                        lastRange[1] = match.start()
+                        lastRange = None
+                    if match.group(1) is not None:
+                        if subcases:
+                            subcases[-1]['end'] = match.start()
+                        subcases.append({'subcase': int(match.group(1)), 'label': match.group(2).decode(),
+                                         'start': match.start(), 'end': stat.st_size, 'blocks': dict()})
+                    elif subcases:
+                        lastRange = [match.start(), stat.st_size]
+                        subcases[-1]['blocks'][match.group(3).decode()] = lastRange
+                if lastRange is not None:
+                    lastRange[1] = subcases[-1]['end']
+    return {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'subcases': subcases}
+
+def load_index(path, persist=True):
+    """
+    Index of path, read from beside the file if it is still up to date, otherwise rebuilt (and stored if persist).
+    """
+    stat = os.stat(path)
+    try:
+        with open(index_path(path), 'r') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION and index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+    index = build_index(path)
+    if persist:
+        try:
+            with open(index_path(path), 'w') as f:
+                json.dump(index, f)
+        except OSError:
+            pass
+    return index
+
+def _read_lines(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start).decode().splitlines()
+
+def read_subcase(path, subcase, blocks=None, index=None):
+    """
+    Records of a single subcase, only its part of the file is read.
+
+    Args:
+        path: .strs file
+        subcase: Subcase number
+        blocks: Block types to read, e.g. ['PLATE'] (default: all)
+        index: Index from load_index, loaded if not given
+
+    Returns:
+        List of StrsRecord
+    """
+    if index is None:
+        index = load_index(path)
+    entries = [entry for entry in index['subcases'] if entry['subcase'] == subcase]
+    if not entries:
+        raise KeyError(f'Subcase {subcase} not in {path}')
+    records = []
+    for entry in entries:
+        if blocks is None:
+            records.extend(iter_records(_read_lines(path, entry['start'], entry['end'])))
+            continue
+        for block in blocks:
+            if block in entry['blocks']:
+                start, end = entry['blocks'][block]
+                records.extend(iter_records(_read_lines(path, start, end), entry['subcase'], entry['label']))
+    return records
+
+def _map_subcase(path, start, end, func):
+    return func(iter_records(_read_lines(path, start, end)))
+
+def map_subcases(path, func=list, jobs=None, index=None):
+    """
+    Apply func to the records of every subcase, each subcase as its own task in a process pool.
+
+    Args:
+        path: .strs file
+        func: Module level function taking an iterable of StrsRecord (default: list)
+        jobs: Number of worker processes (default: number of CPUs, 1 runs serially)
+        index: Index from load_index, loaded if not given
+
+    Returns:
+        List of (subcase, func result) in file order
+    """
+    if index is None:
+        index = load_index(path)
+    entries = index['subcases']
+    if jobs == 1:
+        return [(entry['subcase'], _map_subcase(path, entry['start'], entry['end'], func)) for entry in entries]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_map_subcase, path, entry['start'], entry['end'], func) for entry in entries]
+        return [(entry['subcase'], future.result()) for entry, future in zip(entries, futures)]
+
+
+#Rows of the stringer.xlsx and panel.xlsx sheets
+def stringer_row(record, component_name):
+    sigma_xx = scientific_format(record.values[-1])
+    return [record.element, component_name, sigma_xx, f"Subcase {record.subcase} (LC{record.subcase})"]
+
+def panel_row(record, component_name):
+    _, xx1, xx2, yy1, yy2, xy1, xy2 = record.values
+    xx = scientific_format((xx1 + xx2) / 2)
+    yy = scientific_format((yy1 + yy2) / 2)
+    xy = scientific_format((xy1 + xy2) / 2)
+    return [record.element, component_name, xx, yy, "0.00E+00", xy, "0.00E+00", "0.00E+00",
+            f"Subcase {record.subcase} (LC{record.subcase})"]
+
+def excel_rows(records, elementTopology=None):
+    """
+    Stringer (AXIAL of the BAR block) and panel (averaged PLATE components) rows in one pass over the records.
+
+    Args:
+        records: Iterable of StrsRecord
+        elementTopology: topology.Topology giving the stringer and panel elements (default: layout in config.ini)
+
+    Returns:
+        stringer rows, panel rows
+    """
+    if elementTopology is None:
+        elementTopology = topology.default_topology()
+    stringer_all = []
+    panel_all = []
+    for record in records:
+        if record.block not in ('BAR', 'PLATE'):
+            continue
+        code = elementTopology.component_code(record.element)
+        kind = elementTopology.component_kind[code] if code >= 0 else topology.KIND_OTHER
+        if record.block == 'BAR' and len(record.values) >= 10 and kind == topology.KIND_STRINGER:
+            stringer_all.append(stringer_row(record, elementTopology.component_names[code]))
+        elif record.block == 'PLATE' and len(record.values) == 7 and kind == topology.KIND_PANEL:
+            panel_all.append(panel_row(record, elementTopology.component_names[code]))
+    return stringer_all, panel_all
+
+
+#Structured arrays, one per block type with the fields element, subcase and one float64 field per column
+def block_dtype(columns):
+    return np.dtype([('element', np.int64), ('subcase', np.int64)] + [(column, np.float64) for column in columns])
+
+def block_arrays(records):
+    """
+    Collect the records into one structured array per block type (ROD, BAR, PLATE, ...).
+
+    Rows that do not have a value for every column of their block header (cut off lines) are skipped.
+
+    Returns:
+        Dictionary block -> structured array, rows in file order
+    """
+    rows = dict()
+    columns = dict()
+    for record in records:
+        if record.block not in columns:
+            columns[record.block] = record.columns
+        if record.columns != columns[record.block]:
+            raise ValueError(f'Columns of the {record.block} block change in subcase {record.subcase}')
+        if len(record.values) == len(record.columns):
+            rows.setdefault(record.block, []).append((record.element, record.subcase) + record.values)
+    return {block: np.array(rows.get(block, []), dtype=block_dtype(blockColumns)) for block, blockColumns in columns.items()}
+
+def arrays_path(path):
+    return path + '.arrays.npz'
+
+def read_arrays(path, cache=True, jobs=1):
+    """
+    Every stress block of the file as a structured array, see block_arrays.
+
+    Args:
+        path: .strs file
+        cache: Read from / write to the .arrays.npz file beside path, it is used as long as the size and modification
+            time of path did not change
+        jobs: Number of worker processes for parsing (1 runs serially, None uses all CPUs)
+
+    Returns:
+        Dictionary block -> structured array with the fields element, subcase and the block columns
+    """
+    stat = os.stat(path)
+    if cache and os.path.isfile(arrays_path(path)):
+        try:
+            with np.load(arrays_path(path), allow_pickle=False) as npz:
+                meta = json.loads(str(npz['meta']))
+                if meta == {'version': ARRAYS_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}:
+                    return {block: npz[block] for block in npz.files if block != 'meta'}
+        except (OSError, ValueError, KeyError):
+            pass
+    parts = [arrays for subcase, arrays in map_subcases(path, block_arrays, jobs=jobs)]
+    arrays = dict()
+    for block in dict.fromkeys(block for part in parts for block in part):
+        blockParts = [part[block] for part in parts if block in part]
+        if any(blockPart.dtype != blockParts[0].dtype for blockPart in blockParts):
+            raise ValueError(f'Columns of the {block} block differ between subcases')
+        arrays[block] = np.concatenate(blockParts)
+    if cache:
+        meta = {'version': ARRAYS_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        try:
+            temporary = f'{arrays_path(path)}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+            os.replace(temporary, arrays_path(path))
+        except OSError:
+            pass
+    return arrays
+
+#Test case: follow the example file while it is written in pieces
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    import threading
+
+    examplePath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'Auto-Parsing_strs_files', 'exampleStrFile')
+    with open(examplePath, 'r') as file:
+        text = file.read()
+    tempDir = tempfile.mkdtemp()
+    growingPath = os.path.join(tempDir, 'growing.strs')
+
+    def write_in_pieces(pieceSize=1000):
+        with open(growingPath, 'w') as file:
+            for start in range(0, len(text), pieceSize):
+                file.write(text[start:start + pieceSize])
+                file.flush()
+                time.sleep(0.01)
+
+    writer = threading.Thread(target=write_in_pieces)
+    writer.start()
+    subcases = [(subcase, len(records)) for subcase, label, records in follow_subcases(growingPath, blocks=('BAR', 'PLATE'), poll_interval=0.005, idle_timeout=1)]
+    writer.join()
+    shutil.rmtree(tempDir)
+    print(subcases)
+    # we expect 3 subcases with 63 records each
+    assert subcases == [(1, 63), (2, 63), (3, 63)], subcases
@@ -0,0 +1,222 @@
+"""
+Element / component / stiffener relations of the superpanel as dense integer arrays.
+
+Components are coded by their position in component_names (sorted by name, like a groupby on the names), stiffeners
+by their number - 1. Stiffener i consists of stringer i and the panels i and i+1 on both sides of it.
+
+The topology is either read from the element matching files (Topology.from_frames) or generated from the layout in
+the [topology] section of config.ini (Topology.from_layout, default_topology), for any number of panels and stringers.
+loaders.read_topology combines both: the matching files win, the layout has to agree with them and adds the rods.
+"""
+import os
+import configparser
+import warnings
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+KIND_OTHER = 0
+KIND_PANEL = 1
+KIND_STRINGER = 2
+KIND_ROD = 3
+
+COMPONENT_NAME = r'^(panel|stringer|rod)(\d*)$'
+KINDS = {'panel': KIND_PANEL, 'stringer': KIND_STRINGER, 'rod': KIND_ROD}
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini')
+
+
+class Topology:
+    """
+    Attributes:
+        component_names: Component names, the component code is the position in this array
+        component_kind: KIND_PANEL, KIND_STRINGER, KIND_ROD or KIND_OTHER per component code
+        component_number: N of panelN / stringerN per component code, 0 for other components
+        element_component: Component code per element id (the array index), -1 for elements without component
+        component_stiffeners: (component x 2) stiffener codes of every component, -1 where there are less than two
+        stiffener_names: Stiffener names, the stiffener code is the position in this array
+    """
+    def __init__(self, element_ids, element_names):
+        element_ids = np.asarray(element_ids, dtype=np.int64)
+        codes, names = pd.factorize(pd.Series(element_names, dtype=object), sort=True)
+        self.component_names = np.asarray(names, dtype=object)
+        parts = pd.Series(self.component_names, dtype=object).str.extract(COMPONENT_NAME)
+        self.component_kind = parts[0].map(KINDS).fillna(KIND_OTHER).to_numpy(np.int8)
+        self.component_number = pd.to_numeric(parts[1], errors='coerce').fillna(0).to_numpy(np.int32)
+
+        self.element_ids = np.sort(element_ids)
+        self.element_component = np.full(element_ids.max() + 1 if len(element_ids) else 0, -1, dtype=np.int32)
+        self.element_component[element_ids] = codes
+
+        isStringer = self.component_kind == KIND_STRINGER
+        nStiffeners = int(self.component_number[isStringer].max()) if isStringer.any() else 0
+        self.stiffener_names = np.array([f'stiffener{i}' for i in range(1, nStiffeners + 1)], dtype=object)
+        # Stringer n -> stiffener n, panel n -> stiffeners n-1 and n, codes are numbers - 1
+        number = self.component_number
+        stiffeners = np.stack([np.where(isStringer, number - 1, number - 2),
+                               np.where(self.component_kind == KIND_PANEL, number - 1, -1)], axis=1)
+        stiffeners[(stiffeners < 0) | (stiffeners >= nStiffeners)] = -1
+        stiffeners[(self.component_kind == KIND_OTHER) | (self.component_kind == KIND_ROD)] = -1
+        # Move the valid codes to the front, so a panel at the edge has (stiffener, -1)
+        stiffeners = np.where(stiffeners[:, :1] < 0, stiffeners[:, ::-1], stiffeners)
+        self.component_stiffeners = stiffeners.astype(np.int32)
+
+    @classmethod
+    def from_frames(cls, component_mapping_df, stringer_mapping_df=None, element_id_column='Element ID', component_name_column='Component Name',
+                    rod_elements=()):
+        """
+        Args:
+            component_mapping_df: Element ID to component name matches (element_component_matching.csv)
+            stringer_mapping_df: Optional element_id to stringer_id matches (stringer_element_matching.csv), checked
+                against the stringer numbers of the component names
+            rod_elements: Elements of the component 'rod' (the matching files do not list the rods), elements that
+                are in component_mapping_df keep their component from there
+        """
+        element_ids = component_mapping_df[element_id_column].to_numpy(np.int64)
+        rod_elements = np.setdiff1d(np.asarray(rod_elements, dtype=np.int64), element_ids)
+        topology = cls(np.concatenate([element_ids, rod_elements]),
+                       np.concatenate([component_mapping_df[component_name_column].to_numpy(object), np.full(len(rod_elements), 'rod', dtype=object)]))
+        if stringer_mapping_df is not None:
+            codes = topology.component_codes(stringer_mapping_df['element_id'].to_numpy())
+            valid = codes >= 0
+            if (~valid).any() or (topology.component_kind[codes] != KIND_STRINGER).any() \
+                    or (topology.component_number[codes[valid]] != stringer_mapping_df['stringer_id'].to_numpy()[valid]).any():
+                raise ValueError('Stringer element matching does not agree with the element component matching')
+        return topology
+
+    @classmethod
+    def from_layout(cls, panels, stringers, elements_per_panel=3, elements_per_stringer=3, first_panel_element=1,
+                    first_stringer_element=None, rod_elements=()):
+        """
+        Regular superpanel: panel i consists of the elements_per_panel consecutive element ids after panel i-1,
+        starting at first_panel_element, the stringers likewise from first_stringer_element (default: right after the
+        panels). Rods go to the component 'rod'.
+        """
+        if first_stringer_element is None:
+            first_stringer_element = first_panel_element + panels * elements_per_panel
+        panelNames = np.array([f'panel{i}' for i in range(1, panels + 1)], dtype=object)
+        stringerNames = np.array([f'stringer{i}' for i in range(1, stringers + 1)], dtype=object)
+        rod_elements = np.asarray(rod_elements, dtype=np.int64)
+        element_ids = np.concatenate([first_panel_element + np.arange(panels * elements_per_panel),
+                                      first_stringer_element + np.arange(stringers * elements_per_stringer),
+                                      rod_elements])
+        element_names = np.concatenate([np.repeat(panelNames, elements_per_panel),
+                                        np.repeat(stringerNames, elements_per_stringer),
+                                        np.full(len(rod_elements), 'rod', dtype=object)])
+        return cls(element_ids, element_names)
+
+    @classmethod
+    def from_config(cls, config_path=CONFIG_PATH):
+        layout = read_layout(config_path)
+        if layout is None:
+            raise ValueError(f'No [topology] section in {config_path}')
+        return cls.from_layout(**layout)
+
+    def component_codes(self, element_ids):
+        # Component code of every element, -1 for unknown elements
+        element_ids = np.asarray(element_ids, dtype=np.int64)
+        codes = np.full(element_ids.shape, -1, dtype=np.int32)
+        known = (element_ids >= 0) & (element_ids < len(self.element_component))
+        codes[known] = self.element_component[element_ids[known]]
+        return codes
+
+    def component_code(self, element_id):
+        # Component code of a single element, -1 for unknown elements
+        return int(self.element_component[element_id]) if 0 <= element_id < len(self.element_component) else -1
+
+    def element_kind(self, element_ids):
+        # KIND_* of every element, KIND_OTHER for unknown elements
+        codes = self.component_codes(element_ids)
+        return np.where(codes >= 0, self.component_kind[codes], KIND_OTHER)
+
+    def codes_of_names(self, names):
+        # Component code of every component name, -1 for unknown names
+        return pd.Index(self.component_names).get_indexer(pd.Index(np.asarray(names, dtype=object))).astype(np.int32)
+
+    def component_names_of(self, element_ids):
+        # Component name of every element, None for unknown elements
+        codes = self.component_codes(element_ids)
+        return np.where(codes >= 0, self.component_names[np.maximum(codes, 0)], None)
+
+    def mismatched_elements(self, other):
+        # Element ids that are in a differently named component (or in none) in the other topology
+        element_ids = np.union1d(self.element_ids, other.element_ids)
+        return element_ids[self.component_names_of(element_ids) != other.component_names_of(element_ids)]
+
+    def component_values(self, names, values):
+        """
+        Values per component code from a table keyed by component name, e.g. the stringer dimensions.
+
+        Args:
+            names: Component name of every row
+            values: (rows x columns) values
+
+        Returns:
+            ((components + 1) x columns) array, NaN for components without a row. The last row belongs to code -1
+            (unknown components) and stays NaN. Rows of names that are not in the topology are dropped, with a
+            warning if they hold any values.
+        """
+        values = np.asarray(values, dtype=float).reshape(len(names), -1)
+        codes = self.codes_of_names(names)
+        known = codes >= 0
+        unknown = ~known & ~np.isnan(values).all(axis=1)
+        if unknown.any():
+            warnings.warn(f"Components not in the topology are ignored: {sorted(set(np.asarray(names, dtype=object)[unknown]))}", RuntimeWarning)
+        table = np.full((len(self.component_names) + 1, values.shape[1]), np.nan)
+        table[codes[known]] = values[known]
+        return table
+
+    def component_categorical(self, element_ids):
+        return pd.Categorical.from_codes(self.component_codes(element_ids), categories=self.component_names)
+
+    def stiffener_categorical(self, stiffener_codes):
+        return pd.Categorical.from_codes(np.asarray(stiffener_codes), categories=self.stiffener_names)
+
+    def element_stiffeners(self, element_ids):
+        """
+        Every (element, stiffener) pair, elements of a panel between two stringers give two pairs.
+
+        Returns:
+            Positions in element_ids (in order, repeated for two stiffeners) and the stiffener codes
+        """
+        codes = self.component_codes(element_ids)
+        stiffeners = np.where((codes >= 0)[:, None], self.component_stiffeners[codes], -1)
+        rows, column = np.nonzero(stiffeners >= 0)
+        return rows, stiffeners[rows, column]
+
+    def stiffener_table(self, element_id_column='Element ID'):
+        # Element ID / Stiffener table of all elements
+        rows, stiffeners = self.element_stiffeners(self.element_ids)
+        return pd.DataFrame({element_id_column: self.element_ids[rows], 'Stiffener': self.stiffener_categorical(stiffeners)})
+
+
+def _parse_ids(text):
+    # '31-36, 40' -> [31, 32, 33, 34, 35, 36, 40]
+    ids = []
+    for part in text.replace(',', ' ').split():
+        start, _, end = part.partition('-')
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+def read_layout(config_path=CONFIG_PATH):
+    """
+    Layout from the [topology] section of config_path, as keyword arguments of Topology.from_layout.
+
+    Returns:
+        Dictionary, None if the file has no [topology] section
+    """
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    if not config.has_section('topology'):
+        return None
+    section = config['topology']
+    layout = {key: section.getint(key) for key in ['panels', 'stringers', 'elements_per_panel', 'elements_per_stringer',
+                                                    'first_panel_element', 'first_stringer_element'] if key in section}
+    layout['rod_elements'] = _parse_ids(section.get('rod_elements', ''))
+    return layout
+
+@lru_cache(maxsize=None)
+def default_topology(config_path=CONFIG_PATH):
+    # Topology of the layout in config.ini, built once per process
+    return Topology.from_config(config_path)